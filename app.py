@@ -1,32 +1,57 @@
-import json
+import threading
 
 import dash
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objects as go
-from dash import dcc, html
+import diskcache
+import plotly.io as pio
+from dash import Patch, ctx, dcc, html, no_update
 from dash.dependencies import Input, Output, State
 
-from data.get_data import get_dataframe_to_plot
+from data.get_data import get_dataset_schema, warm_up_datasets
+from data.registry import dataset_registry
 from templates.description import description
 from templates.header import header
 from templates.plotting import plotting
 from templates.sidebar import sidebar
-from utils.constants import SCALE_OPTIONS, SCALE_OPTIONS_BOTH_DISABLED
-from utils.display import update_plot_layouts
+from utils.background import ThreadedJobManager
+from utils.constants import BACKGROUND_JOBS_DIR
+from utils.display import (
+    get_axis_options,
+    get_axis_types,
+    get_scale_options,
+    get_scale_value,
+)
+from utils.export import (
+    EXPORT_FORMATS,
+    export_figure_spec,
+    export_figure_zip,
+    get_export_filename,
+    renderer_pool,
+)
+from utils.figures import configure_json_engine, get_figure
+from utils.logging import logger
+from utils.metrics import register_metrics, timed_callback
+
+configure_json_engine()
+
+# Dataset shown when the app starts
+DEFAULT_DATASET_KEY = dataset_registry.default().key
 
-# Global variable to store the dataframe
-df, cat_columns = get_dataframe_to_plot()
+# Runs background callbacks (image exports) in threads of the serving process,
+# so they use its warm renderers and image cache
+background_callback_manager = ThreadedJobManager(diskcache.Cache(BACKGROUND_JOBS_DIR))
 
 app = dash.Dash(
     __name__,
     external_stylesheets=[dbc.themes.VAPOR],
     assets_folder="assets",
     prevent_initial_callbacks="initial_duplicate",
+    background_callback_manager=background_callback_manager,
 )
-# Global variable to store the dataframe
-df, cat_columns = get_dataframe_to_plot()
-
+# WSGI application served in production (see gunicorn.conf.py)
+server = app.server
+# Callback latencies and cache hit rates, in the Prometheus format
+register_metrics(server)
 
 app.layout = html.Div(
     [
@@ -51,29 +76,38 @@ app.layout = html.Div(
     Output("y-axis-selector", "options", allow_duplicate=True),
     Output("x-axis-selector", "value", allow_duplicate=True),
     Output("y-axis-selector", "value", allow_duplicate=True),
+    Output("dataset-key", "data"),
     Input("dataset-selector", "value"),
 )
-def update_data_options(selected_dataset: str) -> tuple[list, list, str, str]:
-    global df
-    global cat_columns
-    df, cat_columns = get_dataframe_to_plot(selected_dataset)
-
-    # Generate options for x and y axis selectors based on dataframe columns
-    x_options = [
-        {"label": col, "value": col} for col in df.columns if col not in cat_columns
-    ]
-    y_options = [
-        {"label": col, "value": col} for col in df.columns if col not in cat_columns
-    ]
+@timed_callback
+def update_data_options(selected_dataset: str) -> tuple[list, list, str, str, str]:
+    # The selected dataset lives in the user's browser (dataset-key store), so
+    # callbacks never share mutable state between sessions, threads or workers
+    dataset_key = selected_dataset.lower()
+    schema = get_dataset_schema(dataset_key)
+
+    # Options for x and y axis selectors, prebuilt by the dataset schema
+    x_options = schema.options("numeric")
+    y_options = schema.options("numeric")
 
     return (
         x_options,
         y_options,
         x_options[0]["value"],
         y_options[0]["value"],
+        dataset_key,
     )
 
 
+def _reset_disabled_scales(scale_options: tuple, scales: tuple) -> list:
+    # Disabled scales fall back to linear, unchanged ones are left alone so the
+    # graph is not patched for nothing
+    values = [get_scale_value(*args) for args in zip(scale_options, scales)]
+    return [
+        no_update if value == scale else value for value, scale in zip(values, scales)
+    ]
+
+
 @app.callback(
     Output("x-axis-selector", "options", allow_duplicate=True),
     Output("x-axis-selector", "value", allow_duplicate=True),
@@ -82,86 +116,85 @@ def update_data_options(selected_dataset: str) -> tuple[list, list, str, str]:
     Output("y-axis-selector", "disabled", allow_duplicate=True),
     Output("x-axis-scale", "options", allow_duplicate=True),
     Output("y-axis-scale", "options", allow_duplicate=True),
+    Output("x-axis-scale", "value", allow_duplicate=True),
+    Output("y-axis-scale", "value", allow_duplicate=True),
     Input("plot-type-selector", "value"),
+    State("x-axis-scale", "value"),
+    State("y-axis-scale", "value"),
+    State("dataset-key", "data"),
 )
+@timed_callback
 def update_both_axes_variables_selection_and_scale_options(
     plot_type: str,
-) -> tuple[list, bool, list, bool]:
-    if plot_type == "bar":
-        x_columns = [
-            {"label": col, "value": col} for col in df.columns if col in cat_columns
-        ]
-        y_columns = [{"label": "(plot only one variable)", "value": "no_value"}]
-        y_disabled = False
-        x_scale = SCALE_OPTIONS_BOTH_DISABLED
-        y_scale = SCALE_OPTIONS
-
-    elif plot_type == "pie":
-        x_columns = [
-            {"label": col, "value": col} for col in df.columns if col in cat_columns
-        ]
-        y_columns = [{"label": "", "value": ""}]
-        y_disabled = True
-        x_scale = SCALE_OPTIONS_BOTH_DISABLED
-        y_scale = SCALE_OPTIONS_BOTH_DISABLED
-
-    elif plot_type == "box":
-        x_columns = [
-            {"label": col, "value": col} for col in df.columns if col in cat_columns
-        ]
-        x_columns.insert(0, {"label": "(plot only one variable)", "value": "no_value"})
-        y_columns = [
-            {"label": col, "value": col} for col in df.columns if col not in cat_columns
-        ]
-        y_disabled = False
-        x_scale = SCALE_OPTIONS_BOTH_DISABLED
-        y_scale = SCALE_OPTIONS
-    elif plot_type == "histogram":
-        x_columns = [
-            {"label": col, "value": col} for col in df.columns if col not in cat_columns
-        ]
-        y_columns = [{"label": "", "value": ""}]
-        y_disabled = False
-        x_scale = SCALE_OPTIONS_BOTH_DISABLED
-        y_scale = SCALE_OPTIONS
-
-    elif plot_type == "scatter":
-        x_columns = [
-            {"label": col, "value": col} for col in df.columns if col not in cat_columns
-        ]
-        y_columns = [
-            {"label": col, "value": col} for col in df.columns if col not in cat_columns
-        ]
-        y_disabled = False
-        x_scale = SCALE_OPTIONS
-        y_scale = SCALE_OPTIONS
-
-    else:
-        raise ValueError("Something went wrong.")
+    x_scale: str,
+    y_scale: str,
+    dataset_key: str = DEFAULT_DATASET_KEY,
+) -> tuple:
+    schema = get_dataset_schema(dataset_key)
+    x_columns, y_columns, y_disabled = get_axis_options(plot_type, schema)
+    x_options, y_options = get_scale_options(
+        plot_type, schema, x_columns[0]["value"], y_columns[0]["value"]
+    )
     return (
         x_columns,
         x_columns[0]["value"],
         y_columns,
         y_columns[0]["value"],
         y_disabled,
-        x_scale,
-        y_scale,
+        x_options,
+        y_options,
+        *_reset_disabled_scales((x_options, y_options), (x_scale, y_scale)),
     )
 
 
-# Callback to update graph and store its figure data
+# Callback to disable the logarithmic scale of axes showing columns with
+# non-positive values, switching them back to linear if needed
+@app.callback(
+    Output("x-axis-scale", "options", allow_duplicate=True),
+    Output("y-axis-scale", "options", allow_duplicate=True),
+    Output("x-axis-scale", "value", allow_duplicate=True),
+    Output("y-axis-scale", "value", allow_duplicate=True),
+    Input("x-axis-selector", "value"),
+    Input("y-axis-selector", "value"),
+    State("plot-type-selector", "value"),
+    State("x-axis-scale", "value"),
+    State("y-axis-scale", "value"),
+    State("dataset-key", "data"),
+)
+@timed_callback
+def update_scale_options(
+    x_axis: str,
+    y_axis: str,
+    plot_type: str,
+    x_scale: str,
+    y_scale: str,
+    dataset_key: str = DEFAULT_DATASET_KEY,
+) -> tuple:
+    scale_options = get_scale_options(
+        plot_type, get_dataset_schema(dataset_key), x_axis, y_axis
+    )
+    return (
+        *scale_options,
+        *_reset_disabled_scales(scale_options, (x_scale, y_scale)),
+    )
+
+
+# Callback to build the graph from the data. Style-only selectors are read as
+# State, changing them patches the layout of the existing figure instead
 @app.callback(
     Output("graph-output", "figure"),
-    Output("stored-figure", "data"),
+    Output("figure-spec", "data"),
     Input("x-axis-selector", "value"),
     Input("y-axis-selector", "value"),
-    Input("x-axis-scale", "value"),
-    Input("y-axis-scale", "value"),
-    Input("color-theme-selector", "value"),
+    State("x-axis-scale", "value"),
+    State("y-axis-scale", "value"),
+    State("color-theme-selector", "value"),
     Input("scatter-plot-trendline", "value"),
     Input("plot-type-selector", "value"),
     Input("nbins-selector", "value"),
+    Input("dataset-key", "data"),
 )
+@timed_callback
 def update_graph(
     x_axis: str,
     y_axis: str,
@@ -171,125 +204,56 @@ def update_graph(
     trendline: list,
     plot_type: str,
     nbins: int,
-) -> tuple[go.Figure, str]:
-    if plot_type == "bar":
-        # bar plot (1 variable - categorical)
-        df_count = df[x_axis].value_counts().reset_index()
-        df_count.columns = [x_axis, "count"]
-        fig = px.bar(df_count, x=x_axis, y="count")
-        update_plot_layouts(
-            plot_type,
-            fig,
-            x_axis=x_axis,
-            y_axis=y_axis,
-            x_scale=x_scale,
-            y_scale=y_scale,
-            color_theme=color_theme,
-        )
-
-    elif plot_type == "pie":
-        # pie plot (1 variable - categorical)
-        df_grouped = df.groupby(x_axis).size().reset_index(name="count")
-
-        fig = px.pie(
-            df_grouped,
-            names=x_axis,
-            values="count",
-        )
-
-        update_plot_layouts(
-            plot_type,
-            fig,
-            x_axis=x_axis,
-            y_axis=y_axis,
-            x_scale=x_scale,
-            y_scale=y_scale,
-            color_theme=color_theme,
-        )
-    elif plot_type == "box":
-        # box plot (2 variables - categorical + continuous)
-        try:
-            fig = px.box(
-                df,
-                x=x_axis,  # Categorical variable for x-axis
-                y=y_axis,  # Numerical variable for y-axis
-                # color="y_axis",  # Categorical variable for color differentiation
-            )
-            update_plot_layouts(
-                plot_type,
-                fig,
-                x_axis=x_axis,
-                y_axis=y_axis,
-                x_scale=x_scale,
-                y_scale=y_scale,
-                color_theme=color_theme,
-            )
-        except ValueError:
-            #  plot (1 variable - continuous)
-            fig = px.box(
-                df,
-                y=y_axis,
-            )
-            update_plot_layouts(
-                plot_type,
-                fig,
-                x_axis=None,
-                y_axis=y_axis,
-                x_scale=x_scale,
-                y_scale=y_scale,
-                color_theme=color_theme,
-            )
-    elif plot_type == "scatter":
-        # scatter plot (2 variables - continuous + continuous)
-        if trendline:
-            fig = px.scatter(
-                df,
-                x=x_axis,
-                y=y_axis,
-                text=x_axis,
-                trendline="ols",
-                trendline_color_override="red",
-            )
-        else:
-            fig = px.scatter(df, x=x_axis, y=y_axis, text=x_axis)
-        update_plot_layouts(
-            plot_type,
-            fig,
-            x_axis=x_axis,
-            y_axis=y_axis,
-            x_scale=x_scale,
-            y_scale=y_scale,
-            color_theme=color_theme,
-        )
-
-    elif plot_type == "histogram":
-        # histogram (1 variable - continuous)
-        fig = px.histogram(
-            df,
-            x=x_axis,
-            title=f"Histogram of {x_axis}",
-            labels={"value": x_axis},
-            nbins=nbins,
-        )
-        update_plot_layouts(
-            plot_type,
-            fig,
-            x_axis=x_axis,
-            y_axis=y_axis,
-            x_scale=x_scale,
-            y_scale=y_scale,
-            color_theme=color_theme,
-        )
+    dataset_key: str = DEFAULT_DATASET_KEY,
+) -> tuple[dict, dict]:
+    # The spec lets the server rebuild the figure on demand, e.g. for downloads
+    figure_spec = {
+        "dataset_key": dataset_key,
+        "plot_type": plot_type,
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "trendline": bool(trendline),
+        "nbins": nbins,
+    }
+    payload = get_figure(
+        **figure_spec, x_scale=x_scale, y_scale=y_scale, color_theme=color_theme
+    )
+    return payload, figure_spec
 
-    else:
-        raise ValueError("Wrong plot type.")
-    return fig, fig.to_json()
+
+# Callback to change the color theme of the graph without rebuilding it
+@app.callback(
+    Output("graph-output", "figure", allow_duplicate=True),
+    Input("color-theme-selector", "value"),
+)
+@timed_callback
+def update_graph_theme(color_theme: str) -> Patch:
+    patch = Patch()
+    patch["layout"]["template"] = pio.templates[color_theme].to_plotly_json()
+    return patch
+
+
+# Callback to change the axes scales of the graph without rebuilding it
+@app.callback(
+    Output("graph-output", "figure", allow_duplicate=True),
+    Input("x-axis-scale", "value"),
+    Input("y-axis-scale", "value"),
+    State("plot-type-selector", "value"),
+)
+@timed_callback
+def update_graph_scales(x_scale: str, y_scale: str, plot_type: str) -> Patch:
+    x_type, y_type = get_axis_types(plot_type, x_scale, y_scale)
+    patch = Patch()
+    patch["layout"]["xaxis"]["type"] = x_type
+    patch["layout"]["yaxis"]["type"] = y_type
+    return patch
 
 
 @app.callback(
     Output("outer-output-container-slider", "style"),
     Input("plot-type-selector", "value"),
 )
+@timed_callback
 def toggle_slider_visibility(plot_type):
     if plot_type == "histogram":
         return {
@@ -300,38 +264,84 @@ def toggle_slider_visibility(plot_type):
         return {"display": "none"}
 
 
-# Callback to handle download requests using stored figure data
+# Callback to handle download requests. Images are rendered in a background job,
+# so long exports do not hold up the workers serving graph updates
 @app.callback(
     Output("download-image", "data"),
     Input("download-jpg", "n_clicks"),
     Input("download-png", "n_clicks"),
     Input("download-svg", "n_clicks"),
-    State("stored-figure", "data"),
+    Input("download-all", "n_clicks"),
+    State("figure-spec", "data"),
+    State("x-axis-scale", "value"),
+    State("y-axis-scale", "value"),
+    State("color-theme-selector", "value"),
+    background=True,
+    progress=[Output("export-progress", "value"), Output("export-progress", "label")],
+    running=[
+        (Output("download-jpg", "disabled"), True, False),
+        (Output("download-png", "disabled"), True, False),
+        (Output("download-svg", "disabled"), True, False),
+        (Output("download-all", "disabled"), True, False),
+        (Output("cancel-export", "disabled"), False, True),
+        (
+            Output("export-progress", "style"),
+            {"visibility": "visible", "marginTop": "10px"},
+            {"visibility": "hidden", "marginTop": "10px"},
+        ),
+    ],
+    cancel=[Input("cancel-export", "n_clicks")],
     prevent_initial_call=True,
 )
-def download_image(jpg_clicks, png_clicks, svg_clicks, stored_figure):
-    if not stored_figure:
+@timed_callback
+def download_image(
+    set_progress,
+    jpg_clicks,
+    png_clicks,
+    svg_clicks,
+    all_clicks,
+    figure_spec,
+    x_scale,
+    y_scale,
+    color_theme,
+):
+    if not figure_spec:
         return
 
-    # Load the figure from JSON using plotly.graph_objects
-    fig_dict = json.loads(stored_figure)
-    fig = go.Figure(fig_dict)
-
-    # Determine which button was clicked and save accordingly
-    file_path = ""
-
-    if jpg_clicks:
-        file_path = "output_image.jpg"
-        fig.write_image(file_path)
-        return dcc.send_file(file_path)
-    elif png_clicks:
-        file_path = "output_image.png"
-        fig.write_image(file_path)
-        return dcc.send_file(file_path)
-    elif svg_clicks:
-        file_path = "output_image.svg"
-        fig.write_image(file_path)
-        return dcc.send_file(file_path)
+    full_spec = {
+        **figure_spec,
+        "x_scale": x_scale,
+        "y_scale": y_scale,
+        "color_theme": color_theme,
+    }
+    # Determine which button was clicked and render the image(s) in memory
+    image_format = {
+        "download-jpg": "jpg",
+        "download-png": "png",
+        "download-svg": "svg",
+        "download-all": "zip",
+    }.get(ctx.triggered_id)
+    if image_format is None:
+        return
+    try:
+        if image_format == "zip":
+            image = export_figure_zip(
+                full_spec,
+                progress=lambda done, next_format: set_progress(
+                    (
+                        100 * done // len(EXPORT_FORMATS),
+                        f"Rendering {next_format.upper()}...",
+                    )
+                ),
+            )
+        else:
+            set_progress((0, f"Rendering {image_format.upper()}..."))
+            image = export_figure_spec(full_spec, image_format)
+    except TimeoutError as e:
+        logger.error(f"Image export failed: {e}")
+        return
+    set_progress((100, "Done"))
+    return dcc.send_bytes(image, get_export_filename(figure_spec, image_format))
 
 
 # Callback for modal popup
@@ -340,6 +350,7 @@ def download_image(jpg_clicks, png_clicks, svg_clicks, stored_figure):
     [Input("howto-open", "n_clicks"), Input("howto-close", "n_clicks")],
     [State("modal", "is_open")],
 )
+@timed_callback
 def toggle_modal(n1, n2, is_open):
     if n1 or n2:
         return not is_open
@@ -352,6 +363,7 @@ def toggle_modal(n1, n2, is_open):
     [Input("navbar-toggler", "n_clicks")],
     [State("navbar-collapse", "is_open")],
 )
+@timed_callback
 def toggle_navbar_collapse(n, is_open):
     if n:
         return not is_open
@@ -360,4 +372,9 @@ def toggle_navbar_collapse(n, is_open):
 
 # Run the app
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=8080)
+    # Load the landing dataset and start the image renderers in the background,
+    # so the server starts listening right away
+    warm_up_datasets([DEFAULT_DATASET_KEY])
+    threading.Thread(target=renderer_pool.warm_up, daemon=True).start()
+    # Debug mode (reloader and error pages) is enabled with DASH_DEBUG=true
+    app.run(host="0.0.0.0", port=8080)
@@ -1,13 +1,215 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
 import pandas as pd
 
+from data.registry import dataset_registry
+from utils.columnar_cache import read_schema
+from utils.constants import DATASET_CACHE_MAX_ENTRIES
+from utils.logging import logger
+from utils.metrics import record_cache_lookup, stage
+from utils.schema import DatasetSchema
+from utils.shared_store import shared_dataset_store
+
+
+def _get_mtime(path: str | None) -> float | None:
+    """
+    Return the modification time of a file, or None if it cannot be read.
+    """
+    if path is None:
+        return None
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class DatasetCache:
+    """
+    Thread-safe, process-wide cache of prepared datasets.
+
+    Entries are keyed by the normalized dataset name and the modification
+    time of its source file, so editing the raw file triggers a reload on
+    the next access. Each dataset is loaded at most once at a time, even
+    when several threads request it concurrently. Cached values are shared
+    between callers and must be treated as read-only.
+
+    Parameters:
+    max_entries (int | None): Maximum number of datasets kept in memory.
+                              The least recently used one is evicted first.
+                              None means no limit.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._derived: dict[tuple, dict] = {}
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return any(key[0] == name for key in self._entries)
+
+    def _lookup(self, key: tuple) -> tuple[bool, object]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+            return False, None
+
+    def _drop(self, key: tuple) -> None:
+        del self._entries[key]
+        self._derived.pop(key, None)
+
+    def get(self, name: str, loader: Callable[[], object], source: str | None = None):
+        """
+        Return the cached dataset, loading it with ``loader`` if needed.
+
+        Parameters:
+        name (str): The normalized dataset name.
+        loader (Callable): Function building the dataset when not cached.
+        source (str | None): Path of the source file whose modification
+                             time is part of the cache key.
+
+        Returns:
+        object: The value returned by ``loader``.
+        """
+        return self._get_entry(name, loader, source)[1]
+
+    def get_derived(
+        self,
+        name: str,
+        derived_key: object,
+        build: Callable[[object], object],
+        loader: Callable[[], object],
+        source: str | None = None,
+    ):
+        """
+        Return a value computed from a dataset, building it once per load.
+
+        Derived values are dropped together with the dataset they were
+        computed from, so they are rebuilt after a reload or invalidation.
+
+        Parameters:
+        name (str): The normalized dataset name.
+        derived_key (object): Hashable key identifying the derived value.
+        build (Callable): Function computing the value from the dataset.
+        loader (Callable): Function building the dataset when not cached.
+        source (str | None): Path of the dataset source file.
+
+        Returns:
+        object: The value returned by ``build``.
+        """
+        key, dataset = self._get_entry(name, loader, source)
+        with self._lock:
+            derived = self._derived.setdefault(key, {})
+            if derived_key in derived:
+                return derived[derived_key]
+        value = build(dataset)
+        with self._lock:
+            # Only keep the value if the dataset was not reloaded meanwhile
+            if key in self._entries:
+                self._derived.setdefault(key, {})[derived_key] = value
+        return value
+
+    def get_version(
+        self, name: str, loader: Callable[[], object], source: str | None = None
+    ) -> int:
+        """
+        Return a number that changes every time the dataset is (re)loaded.
+
+        Parameters:
+        name (str): The normalized dataset name.
+        loader (Callable): Function building the dataset when not cached.
+        source (str | None): Path of the dataset source file.
+
+        Returns:
+        int: The number of times the dataset has been loaded.
+        """
+        self._get_entry(name, loader, source)
+        with self._lock:
+            return self._versions[name]
+
+    def _get_entry(
+        self, name: str, loader: Callable[[], object], source: str | None = None
+    ) -> tuple[tuple, object]:
+        key = (name, _get_mtime(source))
+        found, value = self._lookup(key)
+        record_cache_lookup("dataset", found)
+        if found:
+            return key, value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded the dataset while we waited
+            found, value = self._lookup(key)
+            if found:
+                return key, value
+            logger.info(f"Loading dataset '{name}'")
+            value = loader()
+            with self._lock:
+                for stale_key in [k for k in self._entries if k[0] == name]:
+                    self._drop(stale_key)
+                self._entries[key] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+                while self.max_entries is not None and len(self._entries) > max(
+                    self.max_entries, 1
+                ):
+                    evicted_key = next(iter(self._entries))
+                    self._drop(evicted_key)
+                    logger.info(f"Evicting dataset '{evicted_key[0]}' from cache")
+        return key, value
+
+    def invalidate(self, name: str | None = None) -> None:
+        """
+        Drop cached datasets.
+
+        Parameters:
+        name (str | None): The normalized dataset name to drop. If None,
+                           the whole cache is cleared.
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._derived.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == name]:
+                    self._drop(key)
+
+
+dataset_cache = DatasetCache(max_entries=DATASET_CACHE_MAX_ENTRIES)
+
+
+def _get_loader(spec) -> Callable[[], tuple]:
+    """
+    Return the function loading a dataset into ``dataset_cache``: through the
+    shared dataset store if it is enabled, or else in this process.
+    """
+    if not shared_dataset_store.enabled:
+        return stage("data_fetch")(spec.load)
+    return stage("data_fetch")(
+        lambda: shared_dataset_store.load(spec.key, spec.load, _get_mtime(spec.source))
+    )
+
 
 def get_dataframe_to_plot(name: str = "housing data") -> pd.DataFrame:
     """
     Retrieve a DataFrame based on the specified dataset name.
 
+    Datasets are loaded once per process and served from ``dataset_cache``
+    afterwards; the returned objects are shared and must not be modified.
+
     Parameters:
-    name (str): The name of the dataset to retrieve. It can be either
-                'housing data' or 'credit risk'.
+    name (str): The name of the dataset to retrieve, as declared in the
+                dataset registry (see ``data.registry``).
 
     Returns:
     pd.DataFrame: The DataFrame corresponding to the selected dataset.
@@ -15,13 +217,179 @@ def get_dataframe_to_plot(name: str = "housing data") -> pd.DataFrame:
     Raises:
     ValueError: If the specified dataset name is not recognized.
     """
-    if name.lower() == "housing data":
-        from data_queries.housing_queries import build_plot_df
+    spec = dataset_registry.get(name)
+    return dataset_cache.get(spec.key, _get_loader(spec), spec.source)
+
+
+def get_derived_data(name: str, key: object, build: Callable[[tuple], object]):
+    """
+    Retrieve a value computed from a dataset, e.g. an aggregation table.
+
+    The value is built once per loaded version of the dataset and shared
+    between callers, so it must not be modified.
+
+    Parameters:
+    name (str): The name of the dataset the value is computed from.
+    key (object): Hashable key identifying the value within the dataset.
+    build (Callable): Function computing the value from the tuple returned
+                      by ``get_dataframe_to_plot``.
+
+    Returns:
+    object: The value returned by ``build``.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    spec = dataset_registry.get(name)
+    return dataset_cache.get_derived(spec.key, key, build, _get_loader(spec), spec.source)
+
+
+def invalidate_dataset_cache(name: str | None = None) -> None:
+    """
+    Force the given dataset (or all datasets) to be reloaded on next access.
+
+    Parameters:
+    name (str | None): The name of the dataset to invalidate. If None,
+                       every cached dataset is dropped.
+    """
+    # Imported here, utils.export depends on this module
+    from utils.export import image_cache
+
+    key = None if name is None else name.lower()
+    dataset_cache.invalidate(key)
+    shared_dataset_store.invalidate(key)
+    image_cache.invalidate(key)
+
+
+def get_dataset_version(name: str) -> int:
+    """
+    Retrieve a number that changes every time a dataset is (re)loaded.
+
+    Values computed from a dataset outside of ``get_derived_data`` can
+    include it in their cache keys, so they are not reused after a reload.
+
+    Parameters:
+    name (str): The name of the dataset.
+
+    Returns:
+    int: The version of the loaded dataset.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    spec = dataset_registry.get(name)
+    return dataset_cache.get_version(spec.key, _get_loader(spec), spec.source)
+
+
+def get_dataset_mtime(name: str) -> float | None:
+    """
+    Retrieve the modification time of a dataset's source file.
+
+    Unlike ``get_dataset_version``, it is the same in every process, so it
+    can be used in the keys of caches shared between workers.
+
+    Parameters:
+    name (str): The name of the dataset.
+
+    Returns:
+    float | None: The modification time, or None if the file cannot be read.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    return _get_mtime(dataset_registry.get(name).source)
+
+
+def get_dataset_fingerprint(name: str) -> str | None:
+    """
+    Retrieve the fingerprint of the preparation of a dataset (see
+    ``DatasetSpec.fingerprint``).
+
+    Like ``get_dataset_mtime``, it is the same in every process and across
+    restarts, so it can be used in the keys of persistent caches.
+
+    Parameters:
+    name (str): The name of the dataset.
+
+    Returns:
+    str | None: The fingerprint, or None for datasets built by a loader.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    return dataset_registry.get(name).fingerprint
+
+
+def peek_dataset_schema(name: str) -> DatasetSchema | None:
+    """
+    Retrieve the schema of a dataset only if it is available without loading
+    the dataset.
+
+    Parameters:
+    name (str): The name of the dataset.
+
+    Returns:
+    DatasetSchema | None: The schema of the loaded dataset, or else the one
+                          read from the metadata of its columnar file, or
+                          None if neither is available.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    spec = dataset_registry.get(name)
+    if spec.key in dataset_cache:
+        return get_dataset_schema(name)
+    if spec.source is not None:
+        return read_schema(spec.source, spec.fingerprint)
+    return None
+
+
+def get_dataset_schema(name: str) -> DatasetSchema:
+    """
+    Retrieve the schema of a dataset, without loading it when possible.
+
+    The schema is computed once per loaded version of the dataset, or else
+    read from the metadata of its columnar file. The dataset is only loaded
+    when neither is available.
+
+    Parameters:
+    name (str): The name of the dataset.
+
+    Returns:
+    DatasetSchema: The column metadata of the prepared dataset.
+
+    Raises:
+    ValueError: If the specified dataset name is not recognized.
+    """
+    spec = dataset_registry.get(name)
+    if spec.key not in dataset_cache and spec.source is not None:
+        schema = read_schema(spec.source, spec.fingerprint)
+        if schema is not None:
+            return schema
+    return get_derived_data(
+        name, "schema", lambda dataset: DatasetSchema.from_frame(*dataset)
+    )
+
+
+def warm_up_datasets(names: list) -> threading.Thread:
+    """
+    Load datasets in a background thread, so the first requests using them
+    do not wait for them to be loaded.
+
+    Parameters:
+    names (list): The names of the datasets to load.
+
+    Returns:
+    threading.Thread: The started (daemon) thread.
+    """
 
-        return build_plot_df()
-    elif name.lower() == "credit risk":
-        from data_queries.credit_risk_queries import build_plot_df
+    def warm_up() -> None:
+        for name in names:
+            try:
+                get_dataframe_to_plot(name)
+            except Exception as e:
+                logger.error(f"Could not warm up dataset '{name}': {e}")
 
-        return build_plot_df()
-    else:
-        raise ValueError("Dataset not available.")
+    thread = threading.Thread(target=warm_up, name="dataset-warm-up", daemon=True)
+    thread.start()
+    return thread
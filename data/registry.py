@@ -0,0 +1,295 @@
+import importlib
+import json
+import os
+from importlib.metadata import entry_points
+from typing import Callable
+
+import pandas as pd
+
+from utils.columnar_cache import read_prepared, write_prepared
+from utils.constants import (
+    CSV_CHUNK_SIZE,
+    DATASETS_CONFIG,
+    DATASETS_ENTRY_POINT_GROUP,
+    DEFAULT_DATASET,
+)
+from utils.data_manipulation import Pipeline
+from utils.logging import logger
+
+# Cache policies: "columnar" keeps the prepared dataset in memory and in a
+# Feather file next to its source, "memory" keeps it in memory only
+CACHE_POLICIES = ("columnar", "memory")
+# Preprocessing steps that can be declared, see ``Pipeline``
+PIPELINE_STEPS = (
+    "categorical",
+    "drop_nulls",
+    "drop_outliers",
+    "remove_columns",
+    "downcast",
+)
+
+
+def _resolve(path: str) -> Callable:
+    """
+    Import an object given as ``"module:attribute"``.
+    """
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"Loader must be given as 'module:function', got '{path}'.")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class DatasetSpec:
+    """
+    Declaration of a dataset that can be selected in the app.
+
+    A dataset is either loaded by a Python ``loader`` returning the prepared
+    DataFrame and its categorical columns, or read from a CSV ``source`` and
+    prepared by the declared preprocessing ``steps``.
+
+    Parameters:
+    name (str): The name displayed in the dataset selector. Its lowercase
+                form is the key of the dataset.
+    source (str | None): Path of the source file. Its modification time is
+                         part of the dataset cache key.
+    loader (str | None): A ``"module:function"`` building the dataset. It is
+                         resolved on every load and is responsible for
+                         preparing and persisting the data itself: the
+                         other fields below do not apply to it.
+    steps (list | None): The preprocessing steps of CSV datasets, as dicts
+                         with a ``step`` name (see ``PIPELINE_STEPS``) and
+                         the arguments of the ``Pipeline`` method.
+    read_options (dict | None): Additional arguments of ``pd.read_csv``.
+    chunksize (int | None): The number of rows read at once, to stream files
+                            larger than memory (see ``Pipeline.read_csv``).
+    cache (str): The cache policy of CSV datasets (see ``CACHE_POLICIES``).
+
+    Raises:
+    ValueError: If the declaration is incomplete or invalid.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: str | None = None,
+        loader: str | None = None,
+        steps: list | None = None,
+        read_options: dict | None = None,
+        chunksize: int | None = CSV_CHUNK_SIZE,
+        cache: str = "columnar",
+    ):
+        if loader is None and source is None:
+            raise ValueError(f"Dataset '{name}' needs a source or a loader.")
+        if loader is not None and (steps or read_options):
+            raise ValueError(
+                f"Dataset '{name}' has a loader, it cannot declare steps or read options."
+            )
+        if cache not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy '{cache}' of dataset '{name}'.")
+        for step in steps or []:
+            if step.get("step") not in PIPELINE_STEPS:
+                raise ValueError(
+                    f"Unknown preprocessing step '{step.get('step')}' "
+                    f"of dataset '{name}'."
+                )
+        self.name = name
+        self.key = name.lower()
+        self.source = source
+        self.loader = loader
+        self.steps = steps or []
+        self.read_options = read_options or {}
+        self.chunksize = chunksize
+        self.cache = cache
+
+    def __repr__(self) -> str:
+        return f"DatasetSpec(name={self.name!r}, source={self.source!r})"
+
+    def build_pipeline(self) -> Pipeline:
+        """
+        Build the preprocessing pipeline of the declared steps.
+
+        Returns:
+        Pipeline: The pipeline, ready to run.
+        """
+        pipeline = Pipeline()
+        for step in self.steps:
+            params = {key: value for key, value in step.items() if key != "step"}
+            getattr(pipeline, step["step"])(**params)
+        return pipeline
+
+    @property
+    def fingerprint(self) -> str | None:
+        """
+        The fingerprint of the preparation of a CSV dataset (see
+        ``Pipeline.fingerprint``), None for datasets built by a loader.
+        """
+        if self.loader is not None:
+            return None
+        return self.build_pipeline().fingerprint(read_options=self.read_options)
+
+    def load(self) -> tuple[pd.DataFrame, list]:
+        """
+        Load and prepare the dataset.
+
+        Returns:
+        tuple[pd.DataFrame, list]: The prepared DataFrame and the list of
+                                   its categorical columns.
+        """
+        if self.loader is not None:
+            return _resolve(self.loader)()
+
+        pipeline = self.build_pipeline()
+        fingerprint = pipeline.fingerprint(read_options=self.read_options)
+        if self.cache == "columnar":
+            prepared = read_prepared(self.source, fingerprint)
+            if prepared is not None:
+                return prepared
+        df = pipeline.read_csv(self.source, chunksize=self.chunksize, **self.read_options)
+        logger.debug(f"PREPARATION of '{self.name}':\n{pipeline.format_report()}")
+        if self.cache == "columnar":
+            write_prepared(df, self.source, fingerprint)
+        cat_columns = [
+            col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+        ]
+        return df, cat_columns
+
+
+class DatasetRegistry:
+    """
+    The datasets available in the app, in the order they are displayed.
+    """
+
+    def __init__(self):
+        self._datasets: dict[str, DatasetSpec] = {}
+
+    def __len__(self) -> int:
+        return len(self._datasets)
+
+    def __iter__(self):
+        return iter(self._datasets.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._datasets
+
+    def register(self, spec: DatasetSpec) -> None:
+        """
+        Add a dataset, replacing any dataset with the same key.
+
+        Parameters:
+        spec (DatasetSpec): The dataset declaration.
+        """
+        if spec.key in self._datasets:
+            logger.warning(f"Dataset '{spec.name}' is declared more than once")
+        self._datasets[spec.key] = spec
+
+    def get(self, name: str) -> DatasetSpec:
+        """
+        Return the declaration of a dataset.
+
+        Parameters:
+        name (str): The name of the dataset, in any case.
+
+        Returns:
+        DatasetSpec: The dataset declaration.
+
+        Raises:
+        ValueError: If the dataset is not registered.
+        """
+        try:
+            return self._datasets[name.lower()]
+        except KeyError:
+            raise ValueError("Dataset not available.") from None
+
+    def default(self, name: str | None = DEFAULT_DATASET) -> DatasetSpec:
+        """
+        Return the declaration of the dataset shown when the app starts.
+
+        Parameters:
+        name (str | None): The name of the dataset, in any case. None selects
+                           the first registered dataset.
+
+        Returns:
+        DatasetSpec: The dataset declaration.
+
+        Raises:
+        ValueError: If the dataset is not registered, or no dataset is.
+        """
+        if name is not None:
+            if name not in self:
+                raise ValueError(f"Default dataset '{name}' is not available.")
+            return self.get(name)
+        if not self._datasets:
+            raise ValueError("No dataset is available.")
+        return next(iter(self))
+
+    def load_config(self, path: str) -> None:
+        """
+        Register the datasets declared in a JSON file.
+
+        The file holds a list of objects with the arguments of
+        ``DatasetSpec``. Relative source paths are resolved from the
+        working directory, like the built-in datasets.
+
+        Parameters:
+        path (str): The path of the configuration file.
+
+        Raises:
+        ValueError: If a declaration is invalid.
+        """
+        with open(path) as f:
+            declarations = json.load(f)
+        for declaration in declarations:
+            self.register(DatasetSpec(**declaration))
+
+    def load_entry_points(self, group: str = DATASETS_ENTRY_POINT_GROUP) -> None:
+        """
+        Register the datasets published by installed packages.
+
+        Every entry point of the group must refer to a ``DatasetSpec``, a
+        dict of its arguments, or a list of either.
+
+        Parameters:
+        group (str): The entry point group.
+        """
+        for entry_point in entry_points(group=group):
+            try:
+                declared = entry_point.load()
+                for item in declared if isinstance(declared, list) else [declared]:
+                    self.register(
+                        item if isinstance(item, DatasetSpec) else DatasetSpec(**item)
+                    )
+            except Exception as e:
+                logger.error(f"Could not register datasets of '{entry_point.name}': {e}")
+
+    def options(self) -> list[dict]:
+        """
+        Return the options of the dataset selector.
+
+        Returns:
+        list[dict]: One ``label``/``value`` option per dataset.
+        """
+        return [{"label": spec.name, "value": spec.name} for spec in self]
+
+
+def discover_datasets(config_path: str | None = DATASETS_CONFIG) -> DatasetRegistry:
+    """
+    Build the registry of the datasets declared in the configuration file
+    and by installed packages.
+
+    Parameters:
+    config_path (str | None): The path of the configuration file, if any.
+
+    Returns:
+    DatasetRegistry: The registry.
+    """
+    registry = DatasetRegistry()
+    if config_path is not None:
+        if os.path.exists(config_path):
+            registry.load_config(config_path)
+        else:
+            logger.warning(f"Datasets configuration {config_path} not found")
+    registry.load_entry_points()
+    return registry
+
+
+dataset_registry = discover_datasets()
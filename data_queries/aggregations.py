@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+
+from data.get_data import get_dataframe_to_plot, get_derived_data
+from utils.constants import SCATTER_MAX_POINTS
+from utils.data_manipulation import downsample_grid
+from utils.metrics import stage
+
+
+def build_frequency_tables(df: pd.DataFrame, cat_columns: list) -> dict:
+    """
+    Count the occurrences of every category of the categorical columns.
+
+    Parameters:
+    df (pd.DataFrame): The prepared DataFrame.
+    cat_columns (list): A list of categorical columns to aggregate.
+
+    Returns:
+    dict: A mapping of column name to a DataFrame with the column's
+          categories and a ``count`` column, sorted by descending count.
+    """
+    return {col: count_values(df, col) for col in cat_columns if col in df.columns}
+
+
+def count_values(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Count the occurrences of every value of a column.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to aggregate.
+    column (str): The column whose values are counted.
+
+    Returns:
+    pd.DataFrame: A DataFrame with the column's values and a ``count``
+                  column, sorted by descending count.
+    """
+    df_count = df[column].value_counts().reset_index()
+    df_count.columns = [column, "count"]
+    return df_count
+
+
+@stage("aggregation")
+def get_frequency_table(dataset_key: str, column: str) -> pd.DataFrame:
+    """
+    Retrieve the frequency table of a column of a loaded dataset.
+
+    Tables of all categorical columns are built together, once per loaded
+    version of the dataset. Other columns are counted on first use and
+    cached as well. The returned tables are shared and must not be modified.
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    column (str): The column whose values are counted.
+
+    Returns:
+    pd.DataFrame: A DataFrame with the column's values and a ``count``
+                  column, sorted by descending count.
+    """
+    tables = get_derived_data(
+        dataset_key,
+        "frequency_tables",
+        lambda dataset: build_frequency_tables(*dataset),
+    )
+    if column in tables:
+        return tables[column]
+    return get_derived_data(
+        dataset_key,
+        ("frequency_table", column),
+        lambda dataset: count_values(dataset[0], column),
+    )
+
+
+@stage("aggregation")
+def get_scatter_points(dataset_key: str, x: str, y: str) -> pd.DataFrame:
+    """
+    Retrieve the rows of a dataset to draw on a scatter plot.
+
+    Datasets larger than ``SCATTER_MAX_POINTS`` are downsampled with a
+    density-preserving grid, once per (dataset, x, y).
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    x (str): The column plotted on the x axis.
+    y (str): The column plotted on the y axis.
+
+    Returns:
+    pd.DataFrame: The (possibly downsampled) DataFrame.
+    """
+    if SCATTER_MAX_POINTS is None:
+        return get_dataframe_to_plot(dataset_key)[0]
+    return get_derived_data(
+        dataset_key,
+        ("scatter_points", x, y, SCATTER_MAX_POINTS),
+        lambda dataset: downsample_grid(dataset[0], x, y, SCATTER_MAX_POINTS),
+    )
+
+
+@stage("aggregation")
+def get_float_values(dataset_key: str, column: str) -> np.ndarray:
+    """
+    Retrieve the finite values of a numeric column as a float array.
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    column (str): The numeric column to convert.
+
+    Returns:
+    np.ndarray: The column's finite values, cached per (dataset, column).
+    """
+
+    def build(dataset: tuple) -> np.ndarray:
+        values = dataset[0][column].to_numpy(dtype=float, na_value=np.nan)
+        return values[np.isfinite(values)]
+
+    return get_derived_data(dataset_key, ("float_values", column), build)
+
+
+@stage("aggregation")
+def get_histogram(
+    dataset_key: str, column: str, nbins: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bin a numeric column of a dataset, once per (dataset, column, nbins).
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    column (str): The numeric column to bin.
+    nbins (int): The number of equal-width bins.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray]: The count of values in every bin and the
+                                   ``nbins + 1`` bin edges.
+    """
+    return get_derived_data(
+        dataset_key,
+        ("histogram", column, nbins),
+        lambda _: np.histogram(get_float_values(dataset_key, column), bins=nbins),
+    )
+
+
+def build_box_stats(df: pd.DataFrame, y: str, x: str | None = None) -> pd.DataFrame:
+    """
+    Compute box plot statistics of a numeric column, per category of another.
+
+    Quartiles use linear interpolation and whiskers reach the furthest value
+    within 1.5 IQR of the box, which matches plotly's own box computation.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to summarize.
+    y (str): The numeric column to summarize.
+    x (str | None): The categorical column to group by. If None, the whole
+                    column is summarized as a single group named ``y``.
+
+    Returns:
+    pd.DataFrame: One row per group with the ``q1``, ``median``, ``q3``,
+                  ``lowerfence`` and ``upperfence`` values and the list of
+                  ``outliers``.
+    """
+    values = df[y].dropna()
+    if x is None:
+        groups = pd.Series(y, index=values.index)
+    else:
+        groups = df.loc[values.index, x]
+    grouped = values.groupby(groups, observed=True)
+
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    low_limit = groups.map(stats["q1"] - 1.5 * iqr).astype(float)
+    high_limit = groups.map(stats["q3"] + 1.5 * iqr).astype(float)
+    inside = (values >= low_limit) & (values <= high_limit)
+
+    stats["lowerfence"] = values[inside].groupby(groups[inside], observed=True).min()
+    stats["upperfence"] = values[inside].groupby(groups[inside], observed=True).max()
+    outliers = values[~inside].groupby(groups[~inside], observed=True).agg(list)
+    stats["outliers"] = [outliers.get(group, []) for group in stats.index]
+    return stats
+
+
+@stage("aggregation")
+def get_box_stats(dataset_key: str, y: str, x: str | None = None) -> pd.DataFrame:
+    """
+    Retrieve box plot statistics, computed once per (dataset, x, y).
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    y (str): The numeric column to summarize.
+    x (str | None): The categorical column to group by, if any.
+
+    Returns:
+    pd.DataFrame: The statistics returned by ``build_box_stats``.
+    """
+    return get_derived_data(
+        dataset_key,
+        ("box_stats", x, y),
+        lambda dataset: build_box_stats(dataset[0], y, x),
+    )
+
+
+def fit_trendline(df: pd.DataFrame, x: str, y: str) -> dict | None:
+    """
+    Fit an ordinary least squares line through two numeric columns.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame holding the data.
+    x (str): The explanatory column.
+    y (str): The explained column.
+
+    Returns:
+    dict | None: The ``slope``, ``intercept`` and ``r_squared`` of the fit,
+                 and the ``x`` and ``y`` coordinates of the line's end
+                 points, or None if the line is undefined (e.g. constant x).
+    """
+    x_values = df[x].to_numpy(dtype=float, na_value=np.nan)
+    y_values = df[y].to_numpy(dtype=float, na_value=np.nan)
+    finite = np.isfinite(x_values) & np.isfinite(y_values)
+    x_values, y_values = x_values[finite], y_values[finite]
+    if len(x_values) < 2:
+        return None
+
+    x_centered = x_values - x_values.mean()
+    y_centered = y_values - y_values.mean()
+    sxx = np.dot(x_centered, x_centered)
+    if sxx == 0:
+        return None
+    sxy = np.dot(x_centered, y_centered)
+    syy = np.dot(y_centered, y_centered)
+    slope = sxy / sxx
+    intercept = y_values.mean() - slope * x_values.mean()
+    x_line = np.array([x_values.min(), x_values.max()])
+    return {
+        "slope": float(slope),
+        "intercept": float(intercept),
+        "r_squared": float(sxy**2 / (sxx * syy)) if syy else 1.0,
+        "x": x_line,
+        "y": intercept + slope * x_line,
+    }
+
+
+@stage("aggregation")
+def get_trendline(dataset_key: str, x: str, y: str) -> dict | None:
+    """
+    Retrieve the OLS trendline of two columns, fitted once per (dataset, x, y).
+
+    The line is fitted on the full dataset, even if the scatter plot itself
+    is downsampled.
+
+    Parameters:
+    dataset_key (str): The name of the dataset.
+    x (str): The explanatory column.
+    y (str): The explained column.
+
+    Returns:
+    dict | None: The fit returned by ``fit_trendline``.
+    """
+    return get_derived_data(
+        dataset_key,
+        ("trendline", x, y),
+        lambda dataset: fit_trendline(dataset[0], x, y),
+    )
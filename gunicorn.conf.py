@@ -0,0 +1,72 @@
+# Gunicorn configuration of the production server, used as:
+#   gunicorn --config gunicorn.conf.py app:server
+import multiprocessing
+import os
+import shutil
+import threading
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+# Worker processes, each serving requests with a pool of threads. Graph
+# callbacks mostly run in NumPy/pandas and Plotly, so a few threads per
+# process are enough to overlap I/O without contending for the GIL
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+# Seconds a request may take before its worker is restarted (figure builds
+# on large datasets can take a while on the first request)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+# Import the app in the master process, so the datasets loaded below are
+# shared copy-on-write by all forked workers instead of loaded by each one.
+# Set SHARED_DATASETS_DIR to also share datasets reloaded after the workers
+# started (see utils.shared_store)
+preload_app = True
+accesslog = "-"
+# Every process writes its metrics in this directory, and /metrics merges
+# them (see utils.metrics). prometheus_client reads it when imported, and the
+# app may record metrics while it is preloaded, so the directory is set and
+# emptied here, before the app is loaded
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/data-visualisation-metrics")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def on_starting(server):
+    """
+    Load every registered dataset in the master process, before the workers
+    are forked.
+    """
+    from data.get_data import warm_up_datasets
+    from data.registry import dataset_registry
+
+    warm_up_datasets([spec.key for spec in dataset_registry]).join()
+
+
+def on_exit(server):
+    """
+    Remove the datasets published in shared memory, if any.
+    """
+    from utils.shared_store import shared_dataset_store
+
+    shared_dataset_store.invalidate()
+
+
+def post_fork(server, worker):
+    """
+    Start the image renderers of the worker in the background, so the first
+    export does not wait for them.
+    """
+    from utils.export import renderer_pool
+
+    threading.Thread(target=renderer_pool.warm_up, daemon=True).start()
+
+
+def child_exit(server, worker):
+    """
+    Drop the live metrics (gauges) of a stopped worker, its counters and
+    histograms are still merged.
+    """
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:  # pragma: no cover - prometheus_client is an optional dependency
+        return
+    multiprocess.mark_process_dead(worker.pid)
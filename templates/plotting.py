@@ -13,7 +13,8 @@ plotting = [
                         [
                             # Graph output
                             dcc.Graph(id="graph-output"),
-                            dcc.Store(id="stored-figure"),
+                            # Selection the displayed figure was built from
+                            dcc.Store(id="figure-spec"),
                         ]
                     ),
                 ]
@@ -42,6 +43,25 @@ plotting = [
                         className="btn btn-light",
                         outline=True,
                     ),
+                    dbc.Button(
+                        "All (ZIP)",
+                        id="download-all",
+                        className="btn btn-light",
+                        outline=True,
+                    ),
+                    dbc.Button(
+                        "Cancel",
+                        id="cancel-export",
+                        className="btn btn-light",
+                        outline=True,
+                        disabled=True,
+                    ),
+                    # Progress of the running export
+                    dbc.Progress(
+                        id="export-progress",
+                        value=0,
+                        style={"visibility": "hidden", "marginTop": "10px"},
+                    ),
                     dcc.Download(id="download-image"),
                 ],
                 style={
@@ -1,14 +1,22 @@
 import dash_bootstrap_components as dbc
-import repackage
 from dash import dcc, html
 
-from data.get_data import get_dataframe_to_plot
+from data.get_data import peek_dataset_schema
+from data.registry import dataset_registry
+from utils.constants import (
+    PLOT_THEMES,
+    PLOT_TYPES,
+    SCALE_OPTIONS,
+)
 
-repackage.up()
-from utils.constants import DATASET_OPTIONS, PLOT_THEMES, PLOT_TYPES, SCALE_OPTIONS
-
-# Global variable to store the dataframe
-df, cat_columns = get_dataframe_to_plot()
+# Dataset shown when the app starts
+default_dataset = dataset_registry.default()
+# Schema used to seed the initial dropdown options, only if it is available
+# without loading the dataset (e.g. from its columnar file). Otherwise the
+# selectors start empty and the initial callbacks fill them
+schema = peek_dataset_schema(default_dataset.key)
+numeric_options = schema.options("numeric") if schema is not None else []
+numeric_columns = schema.numeric if schema is not None else []
 
 # Sidebar
 sidebar = [
@@ -24,10 +32,12 @@ sidebar = [
                     ),
                     dcc.Dropdown(
                         id="dataset-selector",
-                        options=DATASET_OPTIONS,
-                        value="Housing Data",
+                        options=dataset_registry.options(),
+                        value=default_dataset.name,
                         style={"color": "black"},
                     ),
+                    # Per-session key of the selected dataset
+                    dcc.Store(id="dataset-key", data=default_dataset.key),
                     # Title for selecting variables with spacing
                     html.H5(
                         "Select variables",
@@ -41,11 +51,8 @@ sidebar = [
                                 [
                                     dcc.Dropdown(
                                         id="x-axis-selector",
-                                        options=[
-                                            {"label": col, "value": col}
-                                            for col in df.columns
-                                        ],
-                                        value=df.columns.values.tolist()[0],
+                                        options=numeric_options,
+                                        value=next(iter(numeric_columns), None),
                                     ),
                                 ],
                                 style={
@@ -61,16 +68,9 @@ sidebar = [
                                 [
                                     dcc.Dropdown(
                                         id="y-axis-selector",
-                                        options=[
-                                            {"label": col, "value": col}
-                                            for col in df.columns
-                                            if col not in cat_columns
-                                        ],
-                                        value=df[
-                                            df.columns.difference(cat_columns)
-                                        ].columns.values.tolist()[
-                                            0
-                                        ],  # Default value
+                                        options=numeric_options,
+                                        # Default value
+                                        value=min(numeric_columns, default=None),
                                     ),
                                 ],
                                 style={
@@ -0,0 +1,133 @@
+import pandas as pd
+import pytest
+import repackage
+from pytest_mock import MockerFixture
+
+repackage.up()
+from data.get_data import invalidate_dataset_cache
+from data.registry import dataset_registry
+from data_queries.aggregations import (
+    build_box_stats,
+    build_frequency_tables,
+    fit_trendline,
+    get_frequency_table,
+    get_histogram,
+    get_scatter_points,
+)
+
+
+@pytest.fixture
+def sample_dataset():
+    """Fixture providing a prepared dataset and its categorical columns."""
+    df = pd.DataFrame(
+        {
+            "grade": ["A", "B", "A", "C", "A", "B"],
+            "amount": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        }
+    )
+    df["grade"] = df["grade"].astype("category")
+    return df, ["grade"]
+
+
+@pytest.fixture
+def mocked_dataset(sample_dataset, mocker: MockerFixture):
+    """Fixture serving the sample dataset through the dataset cache."""
+    invalidate_dataset_cache()
+    mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=sample_dataset
+    )
+    yield sample_dataset
+    invalidate_dataset_cache()
+
+
+def test_build_frequency_tables(sample_dataset):
+    """Test that categories are counted in descending order."""
+    tables = build_frequency_tables(*sample_dataset)
+    assert list(tables) == ["grade"]
+    assert tables["grade"].columns.tolist() == ["grade", "count"]
+    assert tables["grade"]["grade"].tolist() == ["A", "B", "C"]
+    assert tables["grade"]["count"].tolist() == [3, 2, 1]
+
+
+def test_get_frequency_table_is_built_once(mocked_dataset, mocker: MockerFixture):
+    """Test that frequency tables are built once per loaded dataset."""
+    build = mocker.patch(
+        "data_queries.aggregations.build_frequency_tables",
+        wraps=build_frequency_tables,
+    )
+    first = get_frequency_table("housing data", "grade")
+    second = get_frequency_table("housing data", "grade")
+    assert first is second, "Cached frequency table should be reused."
+    assert build.call_count == 1, "Frequency tables should be built only once."
+
+
+def test_get_frequency_table_non_categorical(mocked_dataset):
+    """Test that non-categorical columns can be counted as well."""
+    table = get_frequency_table("housing data", "amount")
+    assert table["count"].sum() == len(mocked_dataset[0])
+
+
+def test_get_scatter_points(mocker: MockerFixture):
+    """Test that only datasets above the limit are downsampled."""
+    invalidate_dataset_cache()
+    df = pd.DataFrame({"amount": [float(i % 7) for i in range(1_000)]})
+    mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=(df, [])
+    )
+    assert get_scatter_points("housing data", "amount", "amount") is df
+    mocker.patch("data_queries.aggregations.SCATTER_MAX_POINTS", 100)
+    points = get_scatter_points("housing data", "amount", "amount")
+    assert len(points) < len(df), "Large datasets should be downsampled."
+    assert get_scatter_points("housing data", "amount", "amount") is points
+    invalidate_dataset_cache()
+
+
+def test_get_histogram(mocked_dataset):
+    """Test that histograms are binned on the server and memoized."""
+    counts, edges = get_histogram("housing data", "amount", 5)
+    assert counts.tolist() == [1, 1, 1, 1, 2]
+    assert edges[0] == 1.0 and edges[-1] == 6.0
+    assert get_histogram("housing data", "amount", 5)[0] is counts
+    assert len(get_histogram("housing data", "amount", 2)[0]) == 2
+
+
+def test_build_box_stats():
+    """Test that box statistics match NumPy quartiles and 1.5 IQR whiskers."""
+    df = pd.DataFrame(
+        {
+            "group": ["a"] * 6 + ["b"] * 3,
+            "value": [1.0, 2.0, 3.0, 4.0, 5.0, 100.0, 10.0, 20.0, 30.0],
+        }
+    )
+    stats = build_box_stats(df, "value", "group")
+    assert stats.index.tolist() == ["a", "b"]
+    assert stats.loc["a", ["q1", "median", "q3"]].tolist() == [2.25, 3.5, 4.75]
+    assert stats.loc["a", "lowerfence"] == 1.0
+    assert stats.loc["a", "upperfence"] == 5.0
+    assert stats.loc["a", "outliers"] == [100.0]
+    assert stats.loc["b", "outliers"] == []
+
+    single = build_box_stats(df, "value")
+    assert single.index.tolist() == ["value"]
+    assert single.loc["value", "median"] == 5.0
+
+
+def test_fit_trendline():
+    """Test that the least squares line matches the exact relation."""
+    df = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, None], "y": [3.0, 5.0, 7.0, 9.0, 1.0]})
+    fit = fit_trendline(df, "x", "y")
+    assert fit["slope"] == pytest.approx(2.0)
+    assert fit["intercept"] == pytest.approx(1.0)
+    assert fit["r_squared"] == pytest.approx(1.0)
+    assert fit["x"].tolist() == [1.0, 4.0]
+    assert fit["y"].tolist() == pytest.approx([3.0, 9.0])
+
+
+def test_fit_trendline_undefined():
+    """Test that no line is fitted through a constant explanatory column."""
+    df = pd.DataFrame({"x": [1.0, 1.0, 1.0], "y": [1.0, 2.0, 3.0]})
+    assert fit_trendline(df, "x", "y") is None
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,9 +1,15 @@
-import plotly.graph_objects as go
+import importlib
+
 import pytest
 import repackage
 
 repackage.up()
+from dash import no_update
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
 from app import (
+    app,
     download_image,
     toggle_modal,
     toggle_navbar_collapse,
@@ -11,7 +17,13 @@ from app import (
     update_both_axes_variables_selection_and_scale_options,
     update_data_options,
     update_graph,
+    update_graph_scales,
+    update_graph_theme,
+    update_scale_options,
 )
+from data.get_data import invalidate_dataset_cache
+from data.registry import dataset_registry
+from utils.constants import SCALE_OPTIONS, SCALE_OPTIONS_LOG_DISABLED
 
 
 @pytest.mark.parametrize(
@@ -30,6 +42,7 @@ from app import (
                 ],
                 "price",
                 "price",
+                "housing data",
             ),
         ),
     ],
@@ -65,6 +78,8 @@ def test_update_data_options(test_input, expected):
                     {"label": "Linear", "value": "linear", "disabled": True},
                     {"label": "Logarithmic", "value": "log", "disabled": True},
                 ],
+                no_update,
+                no_update,
             ),
         ),
         (
@@ -89,12 +104,52 @@ def test_update_data_options(test_input, expected):
                     {"label": "Linear", "value": "linear"},
                     {"label": "Logarithmic", "value": "log"},
                 ],
+                no_update,
+                no_update,
             ),
         ),
     ],
 )
 def test_update_both_axes_variables_selection_and_scale_options(test_input, expected):
-    output = update_both_axes_variables_selection_and_scale_options(test_input)
+    output = update_both_axes_variables_selection_and_scale_options(
+        test_input, "linear", "linear"
+    )
+    assert output == expected
+
+
+def test_update_both_axes_resets_disabled_scales():
+    """A logarithmic scale that gets disabled by the plot type falls back to linear."""
+    output = update_both_axes_variables_selection_and_scale_options("pie", "log", "log")
+    assert output[-2:] == ("linear", "linear")
+
+
+@pytest.mark.parametrize(
+    "test_input,expected",
+    [
+        (
+            ("person_age", "person_income", "scatter", "log", "log", "credit risk"),
+            (SCALE_OPTIONS, SCALE_OPTIONS, no_update, no_update),
+        ),
+        (
+            (
+                "person_emp_length",
+                "loan_percent_income",
+                "scatter",
+                "log",
+                "linear",
+                "credit risk",
+            ),
+            (
+                SCALE_OPTIONS_LOG_DISABLED,
+                SCALE_OPTIONS_LOG_DISABLED,
+                "linear",
+                no_update,
+            ),
+        ),
+    ],
+)
+def test_update_scale_options(test_input, expected):
+    output = update_scale_options(*test_input)
     assert output == expected
 
 
@@ -103,7 +158,27 @@ def test_update_both_axes_variables_selection_and_scale_options(test_input, expe
     [
         (
             ("price", "sqft", "linear", "linear", "ggplot2", True, "scatter", None),
-            (go.Figure, str),
+            (dict, dict),
+        ),
+        (
+            ("house_type", "no_value", "linear", "linear", "plotly", [], "bar", None),
+            (dict, dict),
+        ),
+        (
+            ("city", "", "linear", "linear", "plotly", [], "pie", None),
+            (dict, dict),
+        ),
+        (
+            ("price", "", "linear", "log", "plotly", [], "histogram", 12),
+            (dict, dict),
+        ),
+        (
+            ("house_type", "price", "linear", "linear", "plotly", [], "box", None),
+            (dict, dict),
+        ),
+        (
+            ("no_value", "price", "linear", "linear", "plotly", [], "box", None),
+            (dict, dict),
         ),
     ],
 )
@@ -117,6 +192,66 @@ def test_update_graph(test_input, expected):
     assert [type(i) for i in output] == [i for i in expected]
 
 
+def test_update_graph_large_scatter():
+    """Large scatter plots are drawn with WebGL and without point labels."""
+    fig, _ = update_graph(
+        "person_age",
+        "person_income",
+        "linear",
+        "linear",
+        "plotly",
+        [],
+        "scatter",
+        None,
+        "credit risk",
+    )
+    assert fig["data"][0]["type"] == "scattergl"
+    assert "text" not in fig["data"][0]
+
+
+def test_update_graph_trendline():
+    """The trendline is drawn as a two-point line without statsmodels."""
+    fig, _ = update_graph(
+        "price", "sqft", "linear", "linear", "plotly", ["trendline"], "scatter", None
+    )
+    assert len(fig["data"]) == 2
+    assert fig["data"][1]["mode"] == "lines"
+    assert len(fig["data"][1]["x"]) == 2
+
+
+def test_update_graph_theme():
+    """Changing the theme only patches the layout template."""
+    patch = update_graph_theme("ggplot2").to_plotly_json()
+    assert [op["location"] for op in patch["operations"]] == [["layout", "template"]]
+
+
+@pytest.mark.parametrize(
+    "plot_type,expected",
+    [("scatter", ["log", "linear"]), ("box", ["category", "linear"])],
+)
+def test_update_graph_scales(plot_type, expected):
+    """Changing the scales only patches the axes types."""
+    patch = update_graph_scales("log", "linear", plot_type).to_plotly_json()
+    assert [op["location"] for op in patch["operations"]] == [
+        ["layout", "xaxis", "type"],
+        ["layout", "yaxis", "type"],
+    ]
+    assert [op["params"]["value"] for op in patch["operations"]] == expected
+
+
+def test_dataset_selection_is_not_shared_between_sessions():
+    """Selecting a dataset in one session must not change another session's plot."""
+    update_data_options("Credit Risk")
+    fig, _ = update_graph(
+        "price", "sqft", "linear", "linear", "plotly", [], "scatter", None, "housing data"
+    )
+    assert fig["layout"]["xaxis"]["title"]["text"] == "price"
+    options = update_both_axes_variables_selection_and_scale_options(
+        "bar", "linear", "linear", "credit risk"
+    )
+    assert {"label": "loan_grade", "value": "loan_grade"} in options[0]
+
+
 @pytest.mark.parametrize(
     "test_input,expected",
     [
@@ -137,18 +272,42 @@ def test_toggle_slider_visibility(test_input, expected):
 @pytest.mark.parametrize(
     "test_input,expected",
     [
-        ((False, False, True, None, "scatter", None), "output_image.svg"),
-        ((False, True, False, None, "scatter", None), "output_image.png"),
-        ((True, False, False, None, "scatter", None), "output_image.jpg"),
+        ("download-svg", ".svg"),
+        ("download-png", ".png"),
+        ("download-jpg", ".jpg"),
+        ("download-all", ".zip"),
     ],
 )
-def test_download_image(test_input, expected):
-    jpg, png, svg, data, plot_type, nbins = test_input
-    _, data = update_graph(
-        "price", "sqft", "linear", "linear", "ggplot2", True, plot_type, nbins
+def test_download_image(test_input, expected, mocker):
+    _, figure_spec = update_graph(
+        "price", "sqft", "linear", "linear", "ggplot2", True, "scatter", None
+    )
+    context_value.set(
+        AttributeDict(triggered_inputs=[{"prop_id": f"{test_input}.n_clicks"}])
+    )
+    set_progress = mocker.Mock()
+    output = download_image(
+        set_progress, 1, 1, 1, 1, figure_spec, "linear", "log", "ggplot2"
     )
-    output = download_image(jpg, png, svg, data)
-    assert output["filename"] == expected
+    assert output["filename"].startswith("scatter_price_sqft_")
+    assert output["filename"].endswith(expected)
+    assert output["base64"] and output["content"]
+    set_progress.assert_called_with((100, "Done"))
+
+
+def test_update_graph_figure_spec():
+    """The figure spec holds the data-dependent selection only."""
+    _, figure_spec = update_graph(
+        "price", "sqft", "log", "linear", "ggplot2", ["trendline"], "scatter", 10
+    )
+    assert figure_spec == {
+        "dataset_key": "housing data",
+        "plot_type": "scatter",
+        "x_axis": "price",
+        "y_axis": "sqft",
+        "trendline": True,
+        "nbins": 10,
+    }
 
 
 @pytest.mark.parametrize(
@@ -183,3 +342,22 @@ def test_toggle_navbar_collapse_pos(test_input, expected):
     n, is_open = test_input
     output = toggle_navbar_collapse(n, is_open)
     assert output is expected
+
+
+def test_sidebar_does_not_load_dataset(mocker):
+    """Test that building the layout without a columnar file loads no dataset."""
+    import templates.sidebar
+
+    invalidate_dataset_cache()
+    load = mocker.patch.object(dataset_registry.default(), "load")
+    mocker.patch("data.get_data.read_schema", return_value=None)
+    sidebar = importlib.reload(templates.sidebar)
+    assert load.call_count == 0, "Dataset should not be loaded."
+    assert sidebar.numeric_options == [] and sidebar.numeric_columns == []
+    # The selectors are then filled by the initial call of the dataset callback
+    (callback,) = [
+        callback
+        for callback in app._callback_list
+        if callback["inputs"] == [{"id": "dataset-selector", "property": "value"}]
+    ]
+    assert not callback["prevent_initial_call"]
@@ -0,0 +1,78 @@
+import json
+import threading
+
+import diskcache
+import pytest
+import repackage
+
+repackage.up()
+from utils.background import ThreadedJobManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Fixture providing a job manager storing its state in a temporary cache."""
+    return ThreadedJobManager(diskcache.Cache(str(tmp_path)), workers=2, timeout=10)
+
+
+def make_job_fn(release: threading.Event, done: threading.Event):
+    """Build a job function writing its result once ``release`` is set."""
+
+    def job_fn(key, progress_key, args, context):
+        release.wait(timeout=10)
+        manager_cache = args["cache"]
+        manager_cache.set(key, args["value"])
+        done.set()
+
+    return job_fn
+
+
+def through_browser(job) -> str:
+    """Return the job id as sent back by the browser, which parses numbers as doubles."""
+    value = json.loads(json.dumps({"job": job}), parse_int=float)["job"]
+    return value if isinstance(value, str) else str(int(value))
+
+
+def test_job_id_survives_browser_round_trip(manager):
+    """Test that the id sent back by the browser still identifies the job."""
+    release, done = threading.Event(), threading.Event()
+    args = {"cache": manager.handle, "value": "image"}
+    job = through_browser(
+        manager.call_job_fn("result", make_job_fn(release, done), args, {})
+    )
+    assert manager.job_running(job), "Running job should not look cancelled."
+    manager.terminate_job(job)
+    assert not manager.job_running(job), "Job should be cancellable."
+    release.set()
+    assert done.wait(timeout=10)
+
+
+def test_job_runs_in_thread(manager):
+    """Test that jobs run in the serving process and report their result."""
+    release, done = threading.Event(), threading.Event()
+    args = {"cache": manager.handle, "value": "image"}
+    job = manager.call_job_fn("result", make_job_fn(release, done), args, {})
+    assert manager.job_running(str(job)), "Job should be running."
+    assert manager.get_result("result", None) is manager.UNDEFINED
+    release.set()
+    assert done.wait(timeout=10)
+    assert manager.job_running(job), "Finished job should wait for collection."
+    assert manager.get_result("result", job) == "image"
+    assert not manager.job_running(job), "Collected job should be terminated."
+
+
+def test_cancelled_job_result_is_discarded(manager):
+    """Test that the result of a cancelled job is not kept."""
+    release, done = threading.Event(), threading.Event()
+    args = {"cache": manager.handle, "value": "image"}
+    job = manager.call_job_fn("result", make_job_fn(release, done), args, {})
+    manager.terminate_job(str(job))
+    assert not manager.job_running(job)
+    release.set()
+    assert done.wait(timeout=10)
+    manager._executor.shutdown(wait=True)
+    assert manager.handle.get("result") is None
+
+
+if __name__ == "__main__":
+    pytest.main()
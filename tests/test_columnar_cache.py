@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+import repackage
+
+repackage.up()
+from utils.columnar_cache import (
+    get_columnar_path,
+    is_columnar_fresh,
+    read_prepared,
+    read_schema,
+    write_prepared,
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Fixture providing a raw CSV file in a temporary directory."""
+    path = tmp_path / "dataset.csv"
+    path.write_text("a,b\n1,x\n2,y\n")
+    return str(path)
+
+
+@pytest.fixture
+def prepared_df():
+    """Fixture providing a prepared DataFrame with a non-default index."""
+    df = pd.DataFrame(
+        {"a": [1.5, 2.5, 3.5], "b": ["x", "y", "x"]},
+        index=[0, 2, 5],
+    )
+    df["b"] = df["b"].astype("category")
+    return df
+
+
+def test_get_columnar_path():
+    """Test that the columnar file is placed next to the source."""
+    assert get_columnar_path("data/raw_data/houses.csv") == "data/raw_data/houses.feather"
+
+
+def test_read_prepared_missing(source):
+    """Test that a missing columnar file falls back to the CSV pipeline."""
+    assert read_prepared(source) is None
+
+
+def test_write_and_read_prepared(source, prepared_df):
+    """Test that the prepared DataFrame survives a round trip unchanged."""
+    path = write_prepared(prepared_df, source)
+    assert path == get_columnar_path(source)
+    df, cat_columns = read_prepared(source)
+    pd.testing.assert_frame_equal(df, prepared_df)
+    assert cat_columns == ["b"], "Categorical columns should be restored."
+
+
+def test_stale_columnar_file_is_ignored(source, prepared_df):
+    """Test that a columnar file older than its source is not used."""
+    path = write_prepared(prepared_df, source)
+    os.utime(path, (0, 0))
+    assert not is_columnar_fresh(source)
+    assert read_prepared(source) is None
+
+
+def test_columnar_file_prepared_differently_is_ignored(source, prepared_df):
+    """Test that a columnar file written by another preparation is not used."""
+    write_prepared(prepared_df, source, "fingerprint")
+    assert is_columnar_fresh(source, "fingerprint")
+    assert read_prepared(source, "fingerprint") is not None
+    assert read_prepared(source, "other") is None
+    assert read_schema(source, "other") is None
+    write_prepared(prepared_df, source)
+    assert read_prepared(source, "fingerprint") is None, "Unknown preparation is stale."
+
+
+def test_read_schema(source, prepared_df):
+    """Test that the dataset schema is read from the columnar file metadata."""
+    assert read_schema(source) is None
+    write_prepared(prepared_df, source)
+    schema = read_schema(source)
+    assert schema.numeric == ["a"]
+    assert schema.categorical == ["b"]
+    assert schema.columns["a"].minimum == 1.5
+    assert schema.rows == 3
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -5,6 +5,10 @@ import repackage
 
 repackage.up()
 from utils.data_manipulation import (
+    Pipeline,
+    RunningStats,
+    downcast_dtypes,
+    downsample_grid,
     drop_outliers,
     get_categorical,
     process_null_values,
@@ -62,5 +66,154 @@ def test_remove_columns(sample_df):
     assert df.shape[1] == 2, "There should be 2 columns left in the DataFrame."
 
 
+def test_downsample_grid():
+    """Test downsample_grid function."""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"x": rng.normal(size=10_000), "y": rng.normal(size=10_000)})
+    df.loc[10_000] = [50.0, 50.0]  # Adding an isolated point
+    sampled = downsample_grid(df, "x", "y", max_points=1_000, bins=20)
+
+    assert len(sampled) < 2_000, "The DataFrame should be downsampled."
+    assert 10_000 in sampled.index, "Isolated points should be kept."
+    assert sampled.index.is_monotonic_increasing, "Row order should be preserved."
+    assert downsample_grid(df, "x", "y", max_points=20_000) is df
+
+
+@pytest.fixture
+def raw_df():
+    """Fixture to provide a DataFrame with null values and an outlier."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "age": rng.normal(40, 5, size=200).round(),
+            "grade": rng.choice(["A", "B", "C"], size=200),
+            "rate": rng.normal(size=200),
+        }
+    )
+    df.loc[3, "age"] = 400.0
+    df.loc[[5, 7], "rate"] = np.nan
+    return df
+
+
+def test_pipeline_matches_chained_functions(raw_df):
+    """Test that the fused pipeline gives the same result as chained steps."""
+    expected = drop_outliers(
+        process_null_values(get_categorical(raw_df.copy(), columns=["grade"])),
+        columns=["age"],
+    )
+    pipeline = (
+        Pipeline().categorical(["grade"]).drop_nulls().drop_outliers(columns=["age"])
+    )
+    df = pipeline.run(raw_df.copy())
+    pd.testing.assert_frame_equal(df, expected)
+    assert [(entry["step"], entry["rows"]) for entry in pipeline.report] == [
+        ("categorical", 200),
+        ("drop_nulls", 198),
+        ("drop_outliers", 197),
+        ("apply_filters", 197),
+    ]
+    assert "total" in pipeline.format_report()
+
+
+def test_pipeline_read_csv_skips_removed_columns(raw_df, tmp_path, mocker):
+    """Test that leading column removals are not read from the file."""
+    path = tmp_path / "raw.csv"
+    raw_df.to_csv(path, index=False)
+    read_csv = mocker.spy(pd, "read_csv")
+    df = Pipeline().remove_columns(["rate"]).categorical(["grade"]).read_csv(path)
+    assert read_csv.call_args.kwargs["usecols"] == ["age", "grade"]
+    assert df.columns.tolist() == ["age", "grade"]
+    assert df["grade"].dtype.name == "category"
+
+
+def test_downcast_dtypes():
+    """Test that columns are stored in the smallest types holding their values."""
+    df = pd.DataFrame(
+        {
+            "small": [1, 2, 3, 4],
+            "large": [1, 2, 3, 100_000],
+            "whole": [1.0, 2.0, 3.0, 4.0],
+            "missing": [1.0, np.nan, 3.0, 4.0],
+            "half": [0.5, 1.5, 2.5, 3.5],
+            "precise": [0.1, 0.2, 0.3, 0.4],
+            "grade": ["A", "B", "A", "A"],
+            "name": ["a", "b", "c", "d"],
+        }
+    )
+    result = downcast_dtypes(df)
+    assert result.dtypes.astype(str).to_dict() == {
+        "small": "int8",
+        "large": "int32",
+        "whole": "int8",
+        "missing": "Int8",
+        "half": "float32",
+        "precise": "float64",
+        "grade": "category",
+        "name": "object",
+    }
+    assert result["missing"].isna().sum() == 1
+    assert result["half"].tolist() == df["half"].tolist()
+    assert result.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+
+def test_pipeline_downcast_reports_memory(raw_df):
+    """Test that the downcast step reports memory usage before and after."""
+    pipeline = Pipeline().drop_nulls().downcast()
+    df = pipeline.run(raw_df.copy())
+    entry = pipeline.report[-1]
+    assert entry["step"] == "downcast"
+    assert entry["memory_after"] < entry["memory_before"]
+    assert df["grade"].dtype.name == "category"
+    assert "kB" in pipeline.format_report()
+
+
+def test_pipeline_fingerprint(mocker):
+    """Test that the fingerprint changes with the steps, options and code version."""
+    fingerprint = Pipeline().drop_nulls().downcast().fingerprint()
+    assert fingerprint == Pipeline().drop_nulls().downcast().fingerprint()
+    assert fingerprint != Pipeline().drop_nulls().downcast(0.1).fingerprint()
+    assert fingerprint != Pipeline().downcast().fingerprint()
+    assert fingerprint != Pipeline().drop_nulls().downcast().fingerprint(sep=";")
+    mocker.patch("utils.data_manipulation.PREPARATION_VERSION", 0)
+    assert fingerprint != Pipeline().drop_nulls().downcast().fingerprint()
+
+
+def test_running_stats():
+    """Test that statistics merged from batches match the whole array."""
+    values = np.random.default_rng(0).normal(10, 3, size=1_000)
+    running = RunningStats()
+    for batch in np.array_split(values, 7):
+        running.update(batch)
+    assert running.count == 1_000
+    assert running.mean == pytest.approx(values.mean())
+    assert running.std == pytest.approx(values.std())
+
+
+def test_pipeline_read_csv_chunked(raw_df, tmp_path):
+    """Test that streaming a CSV file gives the same result as reading it at once."""
+    path = tmp_path / "raw.csv"
+    raw_df.to_csv(path, index=False)
+
+    def build():
+        return (
+            Pipeline()
+            .categorical(["grade"])
+            .drop_nulls()
+            .drop_outliers(columns=["age"])
+            .downcast()
+        )
+
+    pipeline = build()
+    df = pipeline.read_csv(path, chunksize=30)
+    pd.testing.assert_frame_equal(df, build().read_csv(path))
+    assert [entry["step"] for entry in pipeline.report] == [
+        "outlier_stats",
+        "read_csv",
+        "apply_filters",
+        "downcast",
+    ]
+    assert pipeline.report[-1]["rows"] == 197
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,9 +1,30 @@
+import pandas as pd
 import plotly.graph_objects as go
 import pytest
 import repackage
 
 repackage.up()
-from utils.display import update_plot_layouts
+from utils.constants import (
+    SCALE_OPTIONS,
+    SCALE_OPTIONS_BOTH_DISABLED,
+    SCALE_OPTIONS_LOG_DISABLED,
+)
+from utils.display import (
+    get_axis_options,
+    get_scale_options,
+    get_scale_value,
+    update_plot_layouts,
+)
+from utils.schema import DatasetSchema
+
+
+@pytest.fixture
+def schema():
+    """Fixture providing the schema of a dataset with a non-positive column."""
+    df = pd.DataFrame(
+        {"kind": ["a", "b", "a"], "price": [1.0, 2.0, 3.0], "change": [-1.0, 0.0, 1.0]}
+    )
+    return DatasetSchema.from_frame(df, ["kind"])
 
 
 @pytest.fixture
@@ -110,6 +131,78 @@ def test_update_plot_layouts(
     assert fig.layout.yaxis.title.text == expected_y_title
 
 
+@pytest.mark.parametrize("plot_type", ["bar", "box"])
+def test_update_plot_layouts_categorical_x_axis(fig, plot_type):
+    """Categorical x axes must not follow the (disabled) x scale selector."""
+    update_plot_layouts(
+        plot_type,
+        fig,
+        x_axis="Category",
+        y_axis="Value",
+        x_scale="linear",
+        y_scale="log",
+        color_theme="plotly",
+    )
+    assert fig.layout.xaxis.type == "category"
+    assert fig.layout.yaxis.type == "log"
+
+
+@pytest.mark.parametrize(
+    "plot_type, expected_x, expected_y, expected_y_disabled",
+    [
+        ("bar", ["kind"], ["no_value"], False),
+        ("pie", ["kind"], [""], True),
+        ("box", ["no_value", "kind"], ["price", "change"], False),
+        ("histogram", ["price", "change"], [""], False),
+        ("scatter", ["price", "change"], ["price", "change"], False),
+    ],
+)
+def test_get_axis_options(schema, plot_type, expected_x, expected_y, expected_y_disabled):
+    x_options, y_options, y_disabled = get_axis_options(plot_type, schema)
+    assert [option["value"] for option in x_options] == expected_x
+    assert [option["value"] for option in y_options] == expected_y
+    assert y_disabled == expected_y_disabled
+
+
+@pytest.mark.parametrize(
+    "plot_type, x_axis, y_axis, expected",
+    [
+        ("scatter", "price", "price", (SCALE_OPTIONS, SCALE_OPTIONS)),
+        ("scatter", "change", "price", (SCALE_OPTIONS_LOG_DISABLED, SCALE_OPTIONS)),
+        (
+            "box",
+            "kind",
+            "change",
+            (SCALE_OPTIONS_BOTH_DISABLED, SCALE_OPTIONS_LOG_DISABLED),
+        ),
+        ("histogram", "change", "", (SCALE_OPTIONS_BOTH_DISABLED, SCALE_OPTIONS)),
+        ("pie", "kind", "", (SCALE_OPTIONS_BOTH_DISABLED, SCALE_OPTIONS_BOTH_DISABLED)),
+    ],
+)
+def test_get_scale_options(schema, plot_type, x_axis, y_axis, expected):
+    """The logarithmic scale is disabled on axes with non-positive columns."""
+    assert get_scale_options(plot_type, schema, x_axis, y_axis) == expected
+
+
+@pytest.mark.parametrize(
+    "options, value, expected",
+    [
+        (SCALE_OPTIONS, "log", "log"),
+        (SCALE_OPTIONS_LOG_DISABLED, "log", "linear"),
+        (SCALE_OPTIONS_BOTH_DISABLED, "log", "linear"),
+        (SCALE_OPTIONS_LOG_DISABLED, None, "linear"),
+    ],
+)
+def test_get_scale_value(options, value, expected):
+    """A disabled scale falls back to linear."""
+    assert get_scale_value(options, value) == expected
+
+
+def test_get_axis_options_unknown_plot_type(schema):
+    with pytest.raises(ValueError, match="Something went wrong."):
+        get_axis_options("radar", schema)
+
+
 # Run the tests with pytest
 if __name__ == "__main__":
     pytest.main()
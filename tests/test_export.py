@@ -0,0 +1,196 @@
+import contextlib
+import threading
+import zipfile
+from io import BytesIO
+
+import plotly.graph_objects as go
+import pytest
+import repackage
+
+repackage.up()
+from data.get_data import invalidate_dataset_cache
+from utils.export import (
+    ImageCache,
+    RendererPool,
+    export_figure,
+    export_figure_spec,
+    export_figure_zip,
+    get_export_filename,
+    get_image_key,
+    image_cache,
+)
+
+
+@pytest.fixture(scope="module")
+def fig():
+    """Fixture to create a small Plotly figure for testing."""
+    return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+
+
+@pytest.fixture
+def figure_spec():
+    return {
+        "dataset_key": "housing data",
+        "plot_type": "box",
+        "x_axis": "no_value",
+        "y_axis": "price (£)",
+        "trendline": False,
+        "nbins": None,
+    }
+
+
+def test_get_export_filename_is_unique(figure_spec):
+    """Test that every export gets its own file name."""
+    first = get_export_filename(figure_spec, "png")
+    second = get_export_filename(figure_spec, "png")
+    assert first != second, "File names should be unique per request."
+    assert first.startswith("box_no_value_price-")
+    assert first.endswith(".png")
+
+
+@pytest.mark.parametrize(
+    "image_format, signature",
+    [("png", b"\x89PNG"), ("jpg", b"\xff\xd8"), ("svg", b"<svg")],
+)
+def test_export_figure(fig, image_format, signature):
+    """Test that figures are rendered in memory."""
+    assert export_figure(fig, image_format).startswith(signature)
+
+
+def test_export_figure_unsupported_format(fig):
+    """Test that unsupported formats are rejected."""
+    with pytest.raises(ValueError, match="Unsupported image format"):
+        export_figure(fig, "gif")
+
+
+def test_renderer_pool_queue_full(fig, mocker):
+    """Test that exports are rejected when all renderers and slots are busy."""
+    pool = RendererPool(workers=1, queue_size=0, timeout=0.1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_render(*_):
+        started.set()
+        release.wait()
+        return b""
+
+    mocker.patch.object(pool, "_render", side_effect=slow_render)
+
+    def render_in_background():
+        # The pool's timeout also ends this wait, but the render keeps its slot
+        with contextlib.suppress(TimeoutError):
+            pool.render(fig, "png")
+
+    busy = threading.Thread(target=render_in_background)
+    busy.start()
+    started.wait()
+    try:
+        with pytest.raises(TimeoutError):
+            pool.render(fig, "png")
+    finally:
+        release.set()
+        busy.join()
+    assert pool.render(fig, "png") == b"", "Slots should be freed after renders."
+
+
+def test_image_cache_lru_by_size():
+    """Test that the least recently used images are evicted first."""
+    cache = ImageCache(max_bytes=10, spill_dir=None)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None, "Least recently used image should be evicted."
+    assert cache.get("a") == b"12345" and cache.get("c") == b"12345"
+
+
+def test_image_cache_spills_to_disk(tmp_path):
+    """Test that evicted images are served from the spill directory."""
+    cache = ImageCache(max_bytes=5, spill_dir=str(tmp_path), max_disk_bytes=100)
+    cache.put("a", b"12345")
+    cache.put("b", b"67890")
+    assert len(cache) == 1
+    assert (tmp_path / "a").read_bytes() == b"12345"
+    assert cache.get("a") == b"12345", "Spilled images should be read back."
+    cache.clear()
+    assert cache.get("a") is None and cache.get("b") is None
+
+
+def test_get_image_key(figure_spec, mocker):
+    """Test that keys are stable and depend on the format, dataset and figure code."""
+    key = get_image_key(figure_spec, "png", 1.0, "a")
+    assert key.startswith("housing_data-")
+    assert key == get_image_key(dict(reversed(figure_spec.items())), "png", 1.0, "a")
+    assert key != get_image_key(figure_spec, "svg", 1.0, "a")
+    assert key != get_image_key(figure_spec, "png", 2.0, "a")
+    assert key != get_image_key(figure_spec, "png", 1.0, "b")
+    mocker.patch("utils.export.FIGURE_VERSION", 0)
+    assert key != get_image_key(figure_spec, "png", 1.0, "a")
+
+
+def test_image_cache_disk_hit_spills_evicted_images(tmp_path):
+    """Test that reading an image back from disk does not lose the images it evicts."""
+    cache = ImageCache(max_bytes=5, spill_dir=str(tmp_path), max_disk_bytes=100)
+    cache.put("a", b"12345")
+    cache.put("b", b"67890")
+    assert cache.get("a") == b"12345"
+    assert cache.get("b") == b"67890", "Image evicted by a disk hit should be spilled."
+
+
+def test_image_cache_invalidate(tmp_path):
+    """Test that the images of one dataset are dropped, in memory and on disk."""
+    cache = ImageCache(max_bytes=5, spill_dir=str(tmp_path))
+    cache.put("sales-1", b"12345")
+    cache.put("sales-2", b"12345")
+    cache.put("housing_data-1", b"12345")
+    cache.invalidate("Sales")
+    assert cache.get("sales-1") is None and cache.get("sales-2") is None
+    assert cache.get("housing_data-1") == b"12345"
+
+
+def test_export_figure_spec_is_cached(mocker):
+    """Test that repeated exports are rendered once per dataset."""
+    image_cache.clear()
+    render = mocker.patch("utils.export.export_figure", return_value=b"image")
+    full_spec = {
+        "dataset_key": "housing data",
+        "plot_type": "histogram",
+        "x_axis": "price",
+        "y_axis": "",
+        "trendline": False,
+        "nbins": 10,
+        "x_scale": "linear",
+        "y_scale": "linear",
+        "color_theme": "plotly",
+    }
+    assert export_figure_spec(full_spec, "png") == b"image"
+    assert export_figure_spec(full_spec, "png") == b"image"
+    assert render.call_count == 1, "Repeated exports should be served from cache."
+    invalidate_dataset_cache("housing data")
+    export_figure_spec(full_spec, "png")
+    assert render.call_count == 2, "Dataset reloads should invalidate images."
+    mocker.patch("utils.export.get_dataset_mtime", return_value=1.0)
+    export_figure_spec(full_spec, "png")
+    assert render.call_count == 3, "Changed sources should invalidate images."
+    mocker.patch("utils.export.get_dataset_fingerprint", return_value="other")
+    export_figure_spec(full_spec, "png")
+    assert render.call_count == 4, "Changed preparations should invalidate images."
+    image_cache.clear()
+
+
+def test_export_figure_zip(figure_spec, mocker):
+    """Test that every format is packed into one archive, reporting progress."""
+    mocker.patch("utils.export.export_figure_spec", side_effect=lambda _, f: f.encode())
+    progress = mocker.Mock()
+    archive = export_figure_zip(figure_spec, progress=progress)
+    with zipfile.ZipFile(BytesIO(archive)) as zf:
+        assert zf.namelist() == ["figure.jpg", "figure.png", "figure.svg"]
+        assert zf.read("figure.svg") == b"svg"
+    assert [c.args for c in progress.call_args_list] == [
+        (0, "jpg"),
+        (1, "png"),
+        (2, "svg"),
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,179 @@
+import base64
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+import repackage
+
+repackage.up()
+from data.get_data import invalidate_dataset_cache
+from utils.figures import (
+    FigureCache,
+    build_figure,
+    encode_typed_array,
+    get_figure,
+    get_figure_key,
+    to_figure_payload,
+)
+
+
+@pytest.fixture
+def figure_spec():
+    """Fixture providing the keyword arguments of a histogram figure."""
+    return {
+        "dataset_key": "housing data",
+        "plot_type": "histogram",
+        "x_axis": "price",
+        "y_axis": "",
+        "trendline": False,
+        "nbins": 10,
+        "x_scale": "linear",
+        "y_scale": "linear",
+        "color_theme": "plotly",
+    }
+
+
+@pytest.mark.parametrize(
+    "plot_type, x_axis, y_axis, expected_trace_types",
+    [
+        ("bar", "house_type", "no_value", ["bar"]),
+        ("pie", "city", "", ["pie"]),
+        ("box", "house_type", "price", ["box"]),
+        ("box", "no_value", "price", ["box"]),
+        ("histogram", "price", "", ["bar"]),
+        ("scatter", "price", "sqft", ["scattergl", "scatter"]),
+    ],
+)
+def test_build_figure(plot_type, x_axis, y_axis, expected_trace_types):
+    """Test that every plot type is built from the housing dataset."""
+    fig = build_figure(
+        dataset_key="housing data",
+        plot_type=plot_type,
+        x_axis=x_axis,
+        y_axis=y_axis,
+        trendline=True,
+        nbins=10,
+        x_scale="linear",
+        y_scale="linear",
+        color_theme="plotly",
+    )
+    assert isinstance(fig, go.Figure)
+    assert [trace.type for trace in fig.data] == expected_trace_types
+
+
+def test_build_figure_wrong_plot_type():
+    """Test that an unknown plot type is rejected."""
+    with pytest.raises(ValueError, match="Wrong plot type."):
+        build_figure(
+            dataset_key="housing data",
+            plot_type="violin",
+            x_axis="price",
+            y_axis="sqft",
+            trendline=False,
+            nbins=None,
+            x_scale="linear",
+            y_scale="linear",
+            color_theme="plotly",
+        )
+
+
+def test_get_figure_is_memoized(figure_spec, mocker):
+    """Test that identical selections are built and encoded once."""
+    cache = FigureCache()
+    mocker.patch("utils.figures.figure_cache", cache)
+    build = mocker.patch("utils.figures.build_figure", wraps=build_figure)
+    encode = mocker.patch("utils.figures.to_figure_payload", wraps=to_figure_payload)
+    first = get_figure(**figure_spec)
+    assert get_figure(**figure_spec) is first
+    assert build.call_count == encode.call_count == 1
+    get_figure(**{**figure_spec, "nbins": 20})
+    assert build.call_count == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["bytes"] > 0
+
+
+def test_get_figure_key(figure_spec, mocker):
+    """Test that keys depend on every input and on the dataset source only."""
+    key = get_figure_key(figure_spec)
+    assert key == get_figure_key(dict(reversed(figure_spec.items())))
+    assert key != get_figure_key({**figure_spec, "color_theme": "ggplot2"})
+    invalidate_dataset_cache("housing data")
+    assert key == get_figure_key(figure_spec), "Keys should be the same in workers."
+    mocker.patch("utils.figures.FIGURE_VERSION", 0)
+    assert key != get_figure_key(figure_spec), "Keys should change with the figure code."
+    mocker.patch("utils.figures.get_dataset_fingerprint", return_value="other")
+    other_preparation = get_figure_key(figure_spec)
+    assert other_preparation != key, "Keys should change with the preparation."
+    mocker.patch("utils.figures.get_dataset_mtime", return_value=1.0)
+    assert get_figure_key(figure_spec) != other_preparation
+
+
+def test_figure_cache_lru_by_size():
+    """Test that the least recently used payloads are evicted by total size."""
+    payload = to_figure_payload(go.Figure(go.Bar(x=["a", "b"], y=np.arange(100))))
+    cache = FigureCache()
+    cache.put("a", payload)
+    size = cache.stats()["bytes"]
+    assert size >= 800, "Arrays should be counted by their size."
+    cache = FigureCache(max_bytes=2 * size)
+    cache.put("a", payload)
+    cache.put("b", payload)
+    cache.get("a")
+    cache.put("c", payload)
+    assert cache.get("b") is None, "Least recently used payload should be evicted."
+    assert cache.get("a") is payload and cache.get("c") is payload
+
+
+def test_figure_cache_shared_between_workers(tmp_path):
+    """Test that payloads built by one worker are served to another."""
+    fig = go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+    FigureCache(shared_dir=str(tmp_path)).put("key", to_figure_payload(fig))
+    other = FigureCache(shared_dir=str(tmp_path))
+    shared = other.get("key")
+    assert go.Figure(shared).to_plotly_json() == fig.to_plotly_json()
+    assert other.stats()["shared_hits"] == 1
+    other.clear()
+    assert FigureCache(shared_dir=str(tmp_path)).get("key") is None
+
+
+@pytest.mark.parametrize(
+    "values, dtype",
+    [
+        (np.array([18, 25, 144]), "u1"),
+        (np.array([-5, 70_000]), "i4"),
+        (np.array([2**40, 1]), "f8"),
+        (np.array([0.5, 1.25]), "f4"),
+        (np.array([0.1, 1.25]), "f8"),
+    ],
+)
+def test_encode_typed_array(values, dtype):
+    """Test that arrays are stored in the smallest lossless plotly.js type."""
+    encoded = encode_typed_array(values)
+    assert encoded["dtype"] == dtype
+    decoded = np.frombuffer(base64.b64decode(encoded["bdata"]), dtype=dtype)
+    assert decoded.tolist() == values.tolist()
+
+
+def test_encode_typed_array_2d():
+    """Test that the shape of 2-D arrays is kept."""
+    encoded = encode_typed_array(np.zeros((3, 2)))
+    assert encoded["shape"] == "3,2"
+
+
+def test_to_figure_payload(mocker):
+    """Test that long numeric arrays are sent as typed arrays when enabled."""
+    fig = go.Figure(go.Scatter(x=np.arange(100), y=np.arange(100) / 3, text=["a"] * 100))
+    assert to_figure_payload(fig)["data"][0]["x"] is not None
+    assert to_figure_payload(fig)["data"][0]["y"].dtype == np.float64
+    mocker.patch("utils.figures.FAST_FIGURE_JSON", True)
+    trace = to_figure_payload(fig)["data"][0]
+    assert trace["x"]["dtype"] == "u1"
+    assert trace["y"]["dtype"] == "f8"
+    assert list(trace["text"]) == ["a"] * 100
+    short = to_figure_payload(go.Figure(go.Bar(x=["a", "b"], y=np.array([1, 2]))))
+    assert list(short["data"][0]["y"]) == [1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,10 +1,33 @@
+import os
+import sys
+import threading
+
 import pandas as pd
 import pytest
 import repackage
 from pytest_mock import MockerFixture
 
 repackage.up()
-from data.get_data import get_dataframe_to_plot
+from data.get_data import (
+    DatasetCache,
+    dataset_cache,
+    get_dataframe_to_plot,
+    get_dataset_schema,
+    get_dataset_version,
+    invalidate_dataset_cache,
+    peek_dataset_schema,
+    warm_up_datasets,
+)
+from data.registry import dataset_registry
+from utils.schema import DatasetSchema
+
+
+@pytest.fixture(autouse=True)
+def clear_dataset_cache():
+    """Make sure every test starts with an empty dataset cache."""
+    invalidate_dataset_cache()
+    yield
+    invalidate_dataset_cache()
 
 
 @pytest.fixture(scope="module")
@@ -29,8 +52,8 @@ def credit_risk_data():
 
 def test_get_dataframe_to_plot_housing_data(housing_data, mocker: MockerFixture):
     """Test retrieving housing data."""
-    with mocker.patch(
-        "data_queries.housing_queries.build_plot_df", return_value=housing_data
+    with mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=housing_data
     ):
         df = get_dataframe_to_plot("housing data")
         assert isinstance(df, pd.DataFrame), "Returned value should be a DataFrame."
@@ -41,8 +64,8 @@ def test_get_dataframe_to_plot_housing_data(housing_data, mocker: MockerFixture)
 
 def test_get_dataframe_to_plot_credit_risk(credit_risk_data, mocker: MockerFixture):
     """Test retrieving credit risk data."""
-    with mocker.patch(
-        "data_queries.credit_risk_queries.build_plot_df", return_value=credit_risk_data
+    with mocker.patch.object(
+        dataset_registry.get("credit risk"), "load", return_value=credit_risk_data
     ):
         df = get_dataframe_to_plot("credit risk")
         assert isinstance(df, pd.DataFrame), "Returned value should be a DataFrame."
@@ -57,5 +80,149 @@ def test_get_dataframe_to_plot_invalid_name():
         get_dataframe_to_plot("invalid dataset")
 
 
+def test_get_dataframe_to_plot_is_cached(housing_data, mocker: MockerFixture):
+    """Test that a dataset is built only once per process."""
+    build = mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=housing_data
+    )
+    first = get_dataframe_to_plot("Housing Data")
+    second = get_dataframe_to_plot("housing data")
+    assert first is second, "Cached dataset should be returned on repeated calls."
+    assert build.call_count == 1, "Dataset should be built only once."
+
+
+def test_invalidate_dataset_cache(housing_data, mocker: MockerFixture):
+    """Test that invalidation forces the dataset to be rebuilt."""
+    build = mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=housing_data
+    )
+    get_dataframe_to_plot("housing data")
+    invalidate_dataset_cache("Housing Data")
+    assert "housing data" not in dataset_cache
+    get_dataframe_to_plot("housing data")
+    assert build.call_count == 2, "Dataset should be rebuilt after invalidation."
+
+
+def test_dataset_cache_reloads_on_source_change(tmp_path, mocker: MockerFixture):
+    """Test that a newer source file invalidates the cached entry."""
+    source = tmp_path / "data.csv"
+    source.write_text("a\n1\n")
+    loader = mocker.Mock(side_effect=["old", "new"])
+    cache = DatasetCache()
+    assert cache.get("dataset", loader, str(source)) == "old"
+    os.utime(source, (0, 0))
+    assert cache.get("dataset", loader, str(source)) == "new"
+    assert len(cache) == 1, "Stale entries should be dropped on reload."
+
+
+def test_dataset_cache_lru_eviction(mocker: MockerFixture):
+    """Test that the least recently used dataset is evicted first."""
+    cache = DatasetCache(max_entries=2)
+    cache.get("a", mocker.Mock(return_value=1))
+    cache.get("b", mocker.Mock(return_value=2))
+    cache.get("a", mocker.Mock(return_value=1))
+    cache.get("c", mocker.Mock(return_value=3))
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache, "Least recently used dataset should be evicted."
+
+
+def test_dataset_cache_contains_during_loads():
+    """Test that membership checks are safe while other threads load datasets."""
+    cache = DatasetCache()
+    errors = []
+    stop = threading.Event()
+
+    def check():
+        while not stop.is_set():
+            try:
+                "dataset 0" in cache
+            except RuntimeError as e:
+                errors.append(e)
+
+    # Switch threads as often as possible, so they interleave mid-iteration
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    checker = threading.Thread(target=check)
+    checker.start()
+    try:
+        for i in range(2_000):
+            cache.get(f"dataset {i % 50}", lambda: i)
+            if i % 50 == 49:
+                cache.invalidate()
+    finally:
+        stop.set()
+        checker.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_dataset_cache_derived_values(mocker: MockerFixture):
+    """Test that derived values are built once and dropped with their dataset."""
+    cache = DatasetCache()
+    loader = mocker.Mock(return_value=[1, 2, 3])
+    build = mocker.Mock(side_effect=sum)
+    assert cache.get_derived("a", "total", build, loader) == 6
+    assert cache.get_derived("a", "total", build, loader) == 6
+    assert build.call_count == 1, "Derived value should be built only once."
+    cache.invalidate("a")
+    cache.get_derived("a", "total", build, loader)
+    assert build.call_count == 2, "Derived value should be rebuilt after reload."
+
+
+def test_get_dataset_version(housing_data, mocker: MockerFixture):
+    """Test that the dataset version changes on every reload."""
+    mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=housing_data
+    )
+    version = get_dataset_version("housing data")
+    assert get_dataset_version("Housing Data") == version
+    invalidate_dataset_cache("housing data")
+    assert get_dataset_version("housing data") == version + 1
+
+
+def test_get_dataset_schema_from_file(housing_data, mocker: MockerFixture):
+    """Test that the schema is read from the columnar file without loading data."""
+    build = mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=(housing_data, [])
+    )
+    schema = DatasetSchema.from_frame(housing_data, [])
+    mocker.patch("data.get_data.read_schema", return_value=schema)
+    assert get_dataset_schema("housing data") is schema
+    assert build.call_count == 0, "Dataset should not be loaded."
+
+
+def test_get_dataset_schema_without_file(housing_data, mocker: MockerFixture):
+    """Test that the schema is computed once per load when no file has it."""
+    mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=(housing_data, [])
+    )
+    mocker.patch("data.get_data.read_schema", return_value=None)
+    schema = get_dataset_schema("housing data")
+    assert schema.numeric == ["price", "size"]
+    assert get_dataset_schema("Housing Data") is schema
+
+
+def test_peek_dataset_schema(housing_data, mocker: MockerFixture):
+    """Test that the schema is only returned when no load is needed."""
+    build = mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=(housing_data, [])
+    )
+    mocker.patch("data.get_data.read_schema", return_value=None)
+    assert peek_dataset_schema("housing data") is None
+    assert build.call_count == 0, "Dataset should not be loaded."
+    schema = get_dataset_schema("housing data")
+    assert peek_dataset_schema("Housing Data") is schema
+    assert build.call_count == 1
+
+
+def test_warm_up_datasets(housing_data, mocker: MockerFixture):
+    """Test that datasets are loaded in the background."""
+    mocker.patch.object(
+        dataset_registry.get("housing data"), "load", return_value=(housing_data, [])
+    )
+    warm_up_datasets(["housing data", "invalid dataset"]).join(timeout=10)
+    assert "housing data" in dataset_cache
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+import repackage
+from flask import Flask
+from prometheus_client import REGISTRY
+
+repackage.up()
+from utils.metrics import record_cache_lookup, register_metrics, stage, timed_callback
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample (0 if not recorded yet)."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_timed_callback_records_latency():
+    """Test that callbacks are timed and keep their name and result."""
+
+    @timed_callback
+    def render_chart(value):
+        return value * 2
+
+    before = sample("callback_latency_seconds_count", callback="render_chart")
+    assert render_chart(21) == 42
+    assert render_chart.__name__ == "render_chart"
+    assert sample("callback_latency_seconds_count", callback="render_chart") == before + 1
+
+
+def test_timed_callback_counts_errors():
+    """Test that callbacks raising an exception are counted."""
+
+    @timed_callback
+    def failing_chart():
+        raise ValueError("Something went wrong.")
+
+    with pytest.raises(ValueError):
+        failing_chart()
+    assert sample("callback_errors_total", callback="failing_chart") == 1
+
+
+def test_nested_stages_are_exclusive():
+    """Test that the time of a nested stage is only counted for it."""
+
+    @timed_callback
+    def staged_chart():
+        with stage("figure_build"):
+            with stage("aggregation"):
+                time.sleep(0.05)
+
+    staged_chart()
+    labels = {"callback": "staged_chart"}
+    aggregation = sample(
+        "callback_stage_latency_seconds_sum", **labels, stage="aggregation"
+    )
+    figure_build = sample(
+        "callback_stage_latency_seconds_sum", **labels, stage="figure_build"
+    )
+    assert aggregation >= 0.05
+    assert figure_build < 0.05, "Nested stage time should not be counted twice."
+
+
+def test_stage_outside_callback():
+    """Test that stages outside of callbacks are not recorded."""
+
+    @stage("aggregation")
+    def aggregate():
+        return 1
+
+    assert aggregate() == 1
+
+
+def test_record_cache_lookup():
+    """Test that cache hits and misses are counted separately."""
+    before = sample("cache_lookups_total", cache="test", result="hit")
+    record_cache_lookup("test", True)
+    record_cache_lookup("test", False)
+    assert sample("cache_lookups_total", cache="test", result="hit") == before + 1
+    assert sample("cache_lookups_total", cache="test", result="miss") >= 1
+
+
+def test_metrics_route():
+    """Test that metrics and response sizes are served in the Prometheus format."""
+    server = Flask(__name__)
+    register_metrics(server)
+
+    @server.route("/chart")
+    def chart():
+        return timed_callback(lambda: "x" * 2000)()
+
+    client = server.test_client()
+    client.get("/chart")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert 'callback_response_bytes_count{callback="<lambda>"}' in response.get_data(
+        as_text=True
+    )
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,153 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+import repackage
+
+repackage.up()
+from data.get_data import get_dataframe_to_plot, invalidate_dataset_cache
+from data.registry import DatasetRegistry, DatasetSpec, dataset_registry
+from utils.columnar_cache import get_columnar_path
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Fixture providing a raw CSV file with an unused column and a null value."""
+    path = tmp_path / "sales.csv"
+    path.write_text("id,region,amount\n1,north,10.0\n2,south,\n3,north,30.0\n")
+    return str(path)
+
+
+@pytest.fixture
+def declaration(source):
+    """Fixture providing the declaration of a CSV dataset."""
+    return {
+        "name": "Sales",
+        "source": source,
+        "steps": [
+            {"step": "remove_columns", "columns": ["id"]},
+            {"step": "categorical", "columns": ["region"]},
+            {"step": "drop_nulls"},
+        ],
+    }
+
+
+def test_load_csv_dataset(declaration, source):
+    """Test that CSV datasets are prepared by their declared steps."""
+    df, cat_columns = DatasetSpec(**declaration).load()
+    assert df.columns.tolist() == ["region", "amount"]
+    assert len(df) == 2
+    assert cat_columns == ["region"]
+    assert os.path.exists(get_columnar_path(source)), "Columnar file should be written."
+
+
+def test_load_csv_dataset_memory_policy(declaration, source):
+    """Test that the memory cache policy does not write a columnar file."""
+    DatasetSpec(**declaration, cache="memory").load()
+    assert not os.path.exists(get_columnar_path(source))
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"source": None},
+        {"cache": "redis"},
+        {"steps": [{"step": "shuffle"}]},
+        {"loader": "x:y"},
+    ],
+)
+def test_invalid_declaration(declaration, overrides):
+    """Test that incomplete or invalid declarations are rejected."""
+    with pytest.raises(ValueError):
+        DatasetSpec(**{**declaration, **overrides})
+
+
+def test_registry_load_config(declaration, tmp_path):
+    """Test that datasets are registered from a JSON file, in order."""
+    path = tmp_path / "datasets.json"
+    path.write_text(json.dumps([{"name": "Other", "loader": "x:y"}, declaration]))
+    registry = DatasetRegistry()
+    registry.load_config(str(path))
+    assert registry.options() == [
+        {"label": "Other", "value": "Other"},
+        {"label": "Sales", "value": "Sales"},
+    ]
+    assert registry.get("SALES").source == declaration["source"]
+    with pytest.raises(ValueError, match="Dataset not available."):
+        registry.get("missing")
+
+
+def test_registry_default(declaration):
+    """Test that the default dataset is the configured one or else the first one."""
+    registry = DatasetRegistry()
+    with pytest.raises(ValueError, match="No dataset is available."):
+        registry.default(None)
+    registry.register(DatasetSpec(**declaration))
+    registry.register(DatasetSpec(**{**declaration, "name": "Other"}))
+    assert registry.default(None).key == "sales"
+    assert registry.default("OTHER").key == "other"
+    with pytest.raises(ValueError, match="Default dataset 'housing data'"):
+        registry.default("housing data")
+
+
+def test_registry_load_entry_points(declaration, mocker):
+    """Test that installed packages can declare datasets."""
+    entry_point = mocker.Mock()
+    entry_point.load.return_value = [declaration]
+    mocker.patch("data.registry.entry_points", return_value=[entry_point])
+    registry = DatasetRegistry()
+    registry.load_entry_points()
+    assert "sales" in registry
+
+
+def test_get_dataframe_to_plot_registered_dataset(declaration, mocker):
+    """Test that registered datasets are served through the dataset cache."""
+    mocker.patch.dict(dataset_registry._datasets)
+    dataset_registry.register(DatasetSpec(**declaration))
+    df, cat_columns = get_dataframe_to_plot("Sales")
+    assert isinstance(df, pd.DataFrame)
+    assert get_dataframe_to_plot("sales")[0] is df
+    invalidate_dataset_cache("sales")
+
+
+def test_default_datasets():
+    """Test that the built-in datasets are declared by the default config."""
+    assert [option["value"] for option in dataset_registry.options()] == [
+        "Housing Data",
+        "Credit Risk",
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, removed, categorical, drops_nulls",
+    [
+        (
+            "Housing Data",
+            ["no", "property_name", "postal_code"],
+            ["house_type", "city"],
+            False,
+        ),
+        (
+            "Credit Risk",
+            [],
+            ["loan_grade", "loan_status", "cb_person_default_on_file"],
+            True,
+        ),
+    ],
+)
+def test_default_datasets_steps(name, removed, categorical, drops_nulls):
+    """Test the preparation declared for the built-in datasets."""
+    spec = dataset_registry.get(name)
+    raw = pd.read_csv(spec.source, nrows=500)
+    df = spec.build_pipeline().run(raw.copy())
+    assert not set(removed) & set(df.columns), "Identifier columns should be removed."
+    for col in categorical:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+    assert 0 < len(df) <= len(raw)
+    if drops_nulls:
+        assert not df.isna().any().any(), "Rows with null values should be removed."
+
+
+if __name__ == "__main__":
+    pytest.main()
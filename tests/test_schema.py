@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+import repackage
+
+repackage.up()
+from utils.schema import DatasetSchema
+
+
+@pytest.fixture
+def df():
+    """Fixture providing a prepared DataFrame with every kind of column."""
+    df = pd.DataFrame(
+        {
+            "city": ["London", "Leeds", "London", None],
+            "price": [100.0, 250.0, None, 80.0],
+            "rooms": [0, 2, 3, 1],
+            "note": ["a", "b", "c", "d"],
+        }
+    )
+    df["city"] = df["city"].astype("category")
+    return df
+
+
+def test_from_frame(df):
+    """Test that the column metadata is computed from the prepared data."""
+    schema = DatasetSchema.from_frame(df, ["city"])
+    assert schema.rows == 4
+    assert schema.numeric == ["price", "rooms"]
+    assert schema.categorical == ["city"]
+    assert schema.options("other") == [{"label": "note", "value": "note"}]
+    price = schema.columns["price"]
+    assert (price.minimum, price.maximum, price.nulls) == (80.0, 250.0, 1)
+    assert schema.columns["city"].cardinality == 2
+
+
+@pytest.mark.parametrize(
+    "column,expected",
+    [("price", True), ("rooms", False), ("city", False), ("no_value", True)],
+)
+def test_is_log_eligible(df, column, expected):
+    """Test that only strictly positive numeric columns can use a log scale."""
+    assert DatasetSchema.from_frame(df, ["city"]).is_log_eligible(column) == expected
+
+
+def test_options_are_copies(df):
+    """Test that modifying returned options does not alter the schema."""
+    schema = DatasetSchema.from_frame(df, ["city"])
+    schema.options("categorical").insert(0, {"label": "", "value": ""})
+    assert len(schema.options("categorical")) == 1
+
+
+def test_dict_round_trip(df):
+    """Test that the schema survives a round trip through its dict form."""
+    schema = DatasetSchema.from_frame(df, ["city"])
+    restored = DatasetSchema.from_dict(schema.to_dict())
+    assert restored.to_dict() == schema.to_dict()
+    assert restored.options("numeric") == schema.options("numeric")
+
+
+if __name__ == "__main__":
+    pytest.main()
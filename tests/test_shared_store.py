@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+import pytest
+import repackage
+
+repackage.up()
+from utils.shared_store import SharedDatasetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture providing a store publishing datasets in a temporary directory."""
+    return SharedDatasetStore(str(tmp_path / "shm"))
+
+
+@pytest.fixture
+def loader(mocker):
+    """Fixture providing a loader of a prepared dataset."""
+    df = pd.DataFrame(
+        {"price": [1.5, 2.5, 3.5], "city": ["a", "b", "a"]},
+        index=[3, 5, 8],
+    )
+    df["city"] = df["city"].astype("category")
+    return mocker.Mock(return_value=(df, ["city"]))
+
+
+def test_load_publishes_once(store, loader):
+    """Test that a dataset is loaded once and then attached from the store."""
+    df, cat_columns = store.load("housing data", loader, mtime=1.0)
+    again, _ = store.load("housing data", loader, mtime=1.0)
+    assert loader.call_count == 1, "Published dataset should not be loaded again."
+    pd.testing.assert_frame_equal(df, loader.return_value[0])
+    pd.testing.assert_frame_equal(again, df)
+    assert cat_columns == ["city"]
+
+
+def test_attached_dataset_is_read_only(store, loader):
+    """Test that attached columns are read-only views of the shared file."""
+    df, _ = store.load("housing data", loader, mtime=1.0)
+    assert not df["price"].to_numpy().flags.writeable
+    with pytest.raises(ValueError):
+        df["price"].to_numpy()[0] = 0
+
+
+def test_new_version_replaces_stale_file(store, loader):
+    """Test that a changed source is published again and the old file removed."""
+    store.load("housing data", loader, mtime=1.0)
+    store.load("housing data", loader, mtime=2.0)
+    assert loader.call_count == 2
+    assert sorted(os.listdir(store.directory)) == [
+        "housing_data-2.000000.arrow",
+        "housing_data-lock",
+    ]
+
+
+def test_invalidate(store, loader):
+    """Test that invalidated datasets are loaded again."""
+    store.load("housing data", loader, mtime=1.0)
+    store.invalidate("housing data")
+    store.load("housing data", loader, mtime=1.0)
+    assert loader.call_count == 2
+    store.invalidate()
+    assert os.listdir(store.directory) == ["housing_data-lock"], "Locks should be kept."
+
+
+def test_disabled_store(loader):
+    """Test that datasets are loaded in-process when the store is disabled."""
+    assert SharedDatasetStore(None).load("housing data", loader) is loader.return_value
+
+
+def test_publish_failure_falls_back_to_loader(store, loader, mocker):
+    """Test that datasets are still served when they cannot be published."""
+    mocker.patch("utils.shared_store.write_frame", side_effect=OSError("No space"))
+    assert store.load("housing data", loader, mtime=1.0) is loader.return_value
+
+
+if __name__ == "__main__":
+    pytest.main()
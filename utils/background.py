@@ -0,0 +1,87 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dash import DiskcacheManager
+
+from utils.constants import BACKGROUND_JOB_TIMEOUT, BACKGROUND_JOB_WORKERS
+from utils.logging import logger
+
+
+class ThreadedJobManager(DiskcacheManager):
+    """
+    Background callback manager running jobs in a thread pool of the process
+    serving the request.
+
+    ``DiskcacheManager`` forks a new process per job, which starts with cold
+    renderers and loses whatever the job cached in memory. Here jobs run in
+    the long-lived worker process instead, so they share its warm renderer
+    pool and caches. Progress, results and the state of every job are kept
+    in the diskcache, so any worker process can answer the polling requests.
+
+    Threads cannot be killed: a cancelled job runs to completion, but its
+    result is discarded.
+
+    Parameters:
+    cache (diskcache.Cache): The cache storing the state of the jobs.
+    workers (int): The number of jobs running at the same time.
+    timeout (float): Seconds after which a job that never reported a result
+                     (e.g. its worker process died) is considered stopped.
+    """
+
+    def __init__(
+        self,
+        cache,
+        workers: int = BACKGROUND_JOB_WORKERS,
+        timeout: float = BACKGROUND_JOB_TIMEOUT,
+    ):
+        super().__init__(cache)
+        self.workers = workers
+        self.timeout = timeout
+        self._start()
+        # Threads do not survive a fork, e.g. into gunicorn workers
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="background-job"
+        )
+
+    @staticmethod
+    def _make_job_key(job) -> str:
+        return f"job-{job}"
+
+    def call_job_fn(self, key, job_fn, args, context) -> str:
+        # The browser parses numbers as doubles, which would round a large
+        # integer id: a string comes back unchanged in the polling requests
+        job = uuid.uuid4().hex
+        self.handle.set(self._make_job_key(job), True, expire=self.timeout)
+
+        def run() -> None:
+            try:
+                job_fn(key, self._make_progress_key(key), args, context)
+            except Exception as e:
+                logger.error(f"Background job {job} failed: {e}")
+            if not self.job_running(job):
+                # Cancelled meanwhile: nobody will collect the result
+                for entry in (
+                    key,
+                    self._make_progress_key(key),
+                    self._make_set_props_key(key),
+                ):
+                    self.clear_cache_entry(entry)
+
+        self._executor.submit(run)
+        return job
+
+    def job_running(self, job) -> bool:
+        # The job stays "running" until its result is collected or it is
+        # cancelled, so a finished job is never mistaken for a cancelled one
+        return bool(job) and self.handle.get(self._make_job_key(job)) is not None
+
+    def terminate_job(self, job) -> None:
+        if job:
+            self.clear_cache_entry(self._make_job_key(job))
+
+    def terminate_unhealthy_job(self, job) -> bool:
+        return False
@@ -0,0 +1,263 @@
+import json
+import os
+
+import pandas as pd
+
+from utils.constants import USE_COLUMNAR_CACHE
+from utils.logging import logger
+from utils.schema import DatasetSchema
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    pa = feather = None
+
+COLUMNAR_SUFFIX = ".feather"
+_INDEX_COLUMN = "__index__"
+_SCHEMA_METADATA_KEY = b"dataset_schema"
+_FINGERPRINT_METADATA_KEY = b"preparation"
+
+
+def get_columnar_path(source: str) -> str:
+    """
+    Return the path of the columnar file stored next to a raw data file.
+
+    Parameters:
+    source (str): Path of the raw (CSV) data file.
+
+    Returns:
+    str: Path of the corresponding Feather file.
+    """
+    return os.path.splitext(source)[0] + COLUMNAR_SUFFIX
+
+
+def _read_metadata(path: str) -> dict:
+    with pa.memory_map(path) as f:
+        return pa.ipc.open_file(f).schema.metadata or {}
+
+
+def is_columnar_fresh(source: str, fingerprint: str | None = None) -> bool:
+    """
+    Check whether the columnar file exists, is newer than its source and was
+    prepared the same way.
+
+    Parameters:
+    source (str): Path of the raw (CSV) data file.
+    fingerprint (str | None): The fingerprint of the preparation (see
+                              ``Pipeline.fingerprint``). None only checks
+                              the modification times.
+
+    Returns:
+    bool: True if the columnar file can be used instead of the source.
+    """
+    path = get_columnar_path(source)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(source):
+            return False
+        if fingerprint is None:
+            return True
+        stored = _read_metadata(path).get(_FINGERPRINT_METADATA_KEY, b"")
+        return stored.decode() == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+def read_frame(path: str, zero_copy: bool = False) -> tuple[pd.DataFrame, list]:
+    """
+    Load a DataFrame written by ``write_frame``.
+
+    The file is memory-mapped, and categorical columns are restored from
+    the Arrow dictionary encoding.
+
+    Parameters:
+    path (str): Path of the columnar file.
+    zero_copy (bool): If True, columns are read-only views of the mapped file
+                      wherever Arrow allows it (numeric columns without
+                      nulls, categorical codes), instead of copies.
+
+    Returns:
+    tuple[pd.DataFrame, list]: The DataFrame and its list of categorical
+                               columns.
+    """
+    table = feather.read_table(path, memory_map=True)
+    if zero_copy:
+        # Converting the columns one by one avoids consolidating them into
+        # 2-D blocks, which would copy the data out of the mapped file
+        columns = {name: table.column(name).to_pandas() for name in table.column_names}
+        index = pd.Index(columns.pop(_INDEX_COLUMN), copy=False)
+        df = pd.DataFrame(columns, copy=False)
+        df.index = index
+    else:
+        df = table.to_pandas().set_index(_INDEX_COLUMN)
+    df.index.name = None
+    cat_columns = [
+        col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+    ]
+    return df, cat_columns
+
+
+def write_frame(df: pd.DataFrame, path: str, fingerprint: str | None = None) -> None:
+    """
+    Write a DataFrame to a columnar (Feather) file.
+
+    The file is written atomically, so concurrent readers never see a
+    partially written file. The dataset schema and the fingerprint of the
+    preparation are stored in the file metadata, so they can be read
+    without loading the data.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame (categoricals included).
+    path (str): Path of the columnar file.
+    fingerprint (str | None): The fingerprint of the preparation of ``df``.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        cat_columns = [
+            col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+        ]
+        schema = DatasetSchema.from_frame(df, cat_columns)
+        # Feather requires a default index, so the original one is kept as a column
+        table = pa.Table.from_pandas(
+            df.rename_axis(_INDEX_COLUMN).reset_index(), preserve_index=False
+        )
+        metadata = {
+            **(table.schema.metadata or {}),
+            _SCHEMA_METADATA_KEY: json.dumps(schema.to_dict()),
+        }
+        if fingerprint is not None:
+            metadata[_FINGERPRINT_METADATA_KEY] = fingerprint
+        table = table.replace_schema_metadata(metadata)
+        # A single record batch keeps every column contiguous, so it can be
+        # read without concatenating chunks (see ``read_frame``)
+        feather.write_feather(
+            table,
+            tmp_path,
+            compression="uncompressed",
+            chunksize=max(table.num_rows, 1),
+        )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_prepared(
+    source: str, fingerprint: str | None = None
+) -> tuple[pd.DataFrame, list] | None:
+    """
+    Load a prepared DataFrame from its columnar file, if it is up to date.
+
+    The columns are copied out of the file into a writable DataFrame, and
+    categorical columns are restored from the Arrow dictionary encoding.
+
+    Parameters:
+    source (str): Path of the raw (CSV) data file.
+    fingerprint (str | None): The fingerprint of the preparation, a file
+                              prepared differently is stale.
+
+    Returns:
+    tuple[pd.DataFrame, list] | None: The prepared DataFrame and its list of
+                                      categorical columns, or None if the
+                                      columnar file is missing, stale or
+                                      columnar caching is unavailable.
+    """
+    if (
+        not USE_COLUMNAR_CACHE
+        or feather is None
+        or not is_columnar_fresh(source, fingerprint)
+    ):
+        return None
+    path = get_columnar_path(source)
+    try:
+        return read_frame(path)
+    except Exception as e:
+        logger.warning(f"Could not read columnar cache {path}: {e}")
+        return None
+
+
+def read_schema(source: str, fingerprint: str | None = None) -> DatasetSchema | None:
+    """
+    Read the schema of a prepared dataset from its columnar file, without
+    loading any data.
+
+    Parameters:
+    source (str): Path of the raw (CSV) data file.
+    fingerprint (str | None): The fingerprint of the preparation, a file
+                              prepared differently is stale.
+
+    Returns:
+    DatasetSchema | None: The schema stored by ``write_prepared``, or None if
+                          the columnar file is missing, stale, written
+                          without a schema or columnar caching is
+                          unavailable.
+    """
+    if (
+        not USE_COLUMNAR_CACHE
+        or feather is None
+        or not is_columnar_fresh(source, fingerprint)
+    ):
+        return None
+    path = get_columnar_path(source)
+    try:
+        metadata = _read_metadata(path)
+        if _SCHEMA_METADATA_KEY not in metadata:
+            return None
+        return DatasetSchema.from_dict(json.loads(metadata[_SCHEMA_METADATA_KEY]))
+    except Exception as e:
+        logger.warning(f"Could not read columnar cache schema {path}: {e}")
+        return None
+
+
+def write_prepared(
+    df: pd.DataFrame, source: str, fingerprint: str | None = None
+) -> str | None:
+    """
+    Write a prepared DataFrame to a columnar file next to its source.
+
+    The file is written atomically by ``write_frame``.
+
+    Parameters:
+    df (pd.DataFrame): The prepared DataFrame (categoricals included).
+    source (str): Path of the raw (CSV) data file.
+    fingerprint (str | None): The fingerprint of the preparation of ``df``.
+
+    Returns:
+    str | None: Path of the written file, or None if it could not be written.
+    """
+    if not USE_COLUMNAR_CACHE or feather is None:
+        return None
+    path = get_columnar_path(source)
+    try:
+        write_frame(df, path, fingerprint)
+    except Exception as e:
+        logger.warning(f"Could not write columnar cache {path}: {e}")
+        return None
+    return path
+
+
+def build_all() -> list[str]:
+    """
+    Build the columnar files of every available dataset from the raw data.
+
+    Returns:
+    list[str]: Paths of the written columnar files.
+    """
+    from data.registry import dataset_registry
+
+    paths = []
+    for spec in dataset_registry:
+        if spec.source is None:
+            continue
+        path = get_columnar_path(spec.source)
+        if os.path.exists(path):
+            os.remove(path)
+        spec.load()
+        if os.path.exists(path):
+            logger.info(f"Built columnar cache for '{spec.name}': {path}")
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    build_all()
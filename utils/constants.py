@@ -1,8 +1,12 @@
-DATASETS = ["Housing Data", "Credit Risk"]
-DATASET_OPTIONS = [
-    {"label": "Housing Data", "value": "Housing Data"},
-    {"label": "Credit Risk", "value": "Credit Risk"},
-]
+import os
+
+# Name of the dataset shown when the app starts (None = the first registered
+# dataset, see data.registry)
+DEFAULT_DATASET = os.environ.get("DEFAULT_DATASET")
+# JSON file declaring the available datasets (see data.registry), and entry
+# point group through which installed packages can declare more of them
+DATASETS_CONFIG = os.environ.get("DATASETS_CONFIG", "data/datasets.json")
+DATASETS_ENTRY_POINT_GROUP = "data_visualisation.datasets"
 SCALE_OPTIONS = [
     {"label": "Linear", "value": "linear"},
     {"label": "Logarithmic", "value": "log"},
@@ -11,6 +15,11 @@ SCALE_OPTIONS_BOTH_DISABLED = [
     {"label": "Linear", "value": "linear", "disabled": True},
     {"label": "Logarithmic", "value": "log", "disabled": True},
 ]
+# Scale options of axes showing a column with non-positive values
+SCALE_OPTIONS_LOG_DISABLED = [
+    {"label": "Linear", "value": "linear"},
+    {"label": "Logarithmic", "value": "log", "disabled": True},
+]
 PLOT_THEMES = [
     "plotly",
     "plotly_white",
@@ -21,3 +30,59 @@ PLOT_THEMES = [
     "none",
 ]
 PLOT_TYPES = ["scatter", "bar", "histogram", "box", "pie"]
+# Number of rows read at once when preparing CSV datasets (None = read the
+# whole file at once). Streaming keeps files larger than memory loadable
+CSV_CHUNK_SIZE = None
+# Maximum number of prepared datasets kept in memory (None = unlimited)
+DATASET_CACHE_MAX_ENTRIES = None
+# Store prepared datasets as Feather files next to the raw CSVs and load them
+# instead of re-running the preprocessing pipeline when they are up to date
+USE_COLUMNAR_CACHE = True
+# Version of the preparation code (steps, dtype policy, stored schema). It is
+# part of the fingerprint stored in columnar files: bump it whenever prepared
+# data would differ, so files prepared by older code are rebuilt
+PREPARATION_VERSION = 1
+# Directory in shared memory (e.g. /dev/shm/data-visualisation) where prepared
+# datasets are published once and memory-mapped by every worker process. None
+# means every process keeps its own copy of the datasets
+SHARED_DATASETS_DIR = os.environ.get("SHARED_DATASETS_DIR")
+# Scatter plots with more rows are drawn with WebGL and without point labels
+SCATTER_WEBGL_THRESHOLD = 5000
+# Scatter plots with more rows are downsampled (None = never downsample)
+SCATTER_MAX_POINTS = 50000
+# Number of histogram bins used when the slider has no value
+DEFAULT_NBINS = 10
+# Image exports: number of warm Kaleido renderers, number of exports allowed to
+# wait for one, and seconds before an export is given up
+EXPORT_WORKERS = 2
+EXPORT_QUEUE_SIZE = 8
+EXPORT_TIMEOUT = 30
+# Version of the figure building code, part of the keys of the figure and
+# image caches that outlive the process: bump it whenever figures change
+FIGURE_VERSION = 1
+# Rendered images cache: bytes kept in memory, directory receiving the images
+# evicted from memory (None = no disk cache) and bytes kept in that directory
+IMAGE_CACHE_MAX_BYTES = 64 * 1024**2
+IMAGE_CACHE_SPILL_DIR = "./cache/images"
+IMAGE_CACHE_DISK_MAX_BYTES = 512 * 1024**2
+# Background callbacks (image exports): directory storing their state, number
+# of jobs running at once in each worker process, and seconds after which a
+# job that never finished (e.g. its worker died) is given up
+BACKGROUND_JOBS_DIR = "./cache/background-jobs"
+BACKGROUND_JOB_WORKERS = EXPORT_WORKERS + EXPORT_QUEUE_SIZE
+BACKGROUND_JOB_TIMEOUT = 300
+# Built figures cache: bytes of serialized figures kept in memory by each
+# worker, directory of a cache shared by all workers (None = no shared cache)
+# and bytes kept in that directory
+FIGURE_CACHE_MAX_BYTES = 128 * 1024**2
+FIGURE_CACHE_SHARED_DIR = None
+FIGURE_CACHE_SHARED_MAX_BYTES = 1024**3
+# Encode figures with orjson (if installed) and send their numeric arrays as
+# base64 typed arrays instead of JSON numbers
+FAST_FIGURE_JSON = False
+# Level of the app logs (DEBUG logs every preprocessing report)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# Buckets of the callback latency (seconds) and response size (bytes)
+# histograms served on /metrics
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS_PAYLOAD_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
@@ -1,6 +1,11 @@
+import hashlib
+import json
+import time
+
 import numpy as np
 import pandas as pd
-from scipy import stats
+
+from utils.constants import PREPARATION_VERSION
 
 
 def get_categorical(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
@@ -51,6 +56,9 @@ def drop_outliers(
                      pd.DataFrame: The DataFrame after removing outliers.
     """
 
+    # scipy is slow to import and only needed here
+    from scipy import stats
+
     # Calculate Z-scores
     z_scores = np.abs(stats.zscore(df[columns]))
 
@@ -74,3 +82,445 @@ def remove_columns(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
     """
     res = df.drop(columns=columns)
     return res
+
+
+def downcast_dtypes(df: pd.DataFrame, max_category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Store the columns of a DataFrame in the smallest types holding their values.
+
+    Integers are downcast to the smallest integer type, floats holding only
+    integers become integers (nullable ones if they have null values) and
+    other floats become ``float32`` when no value changes. String columns
+    with few distinct values become categorical.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to convert.
+    max_category_ratio (float): The maximum ratio of distinct values to rows
+                                for a string column to become categorical.
+
+    Returns:
+    pd.DataFrame: The converted DataFrame. Unchanged columns are not copied.
+    """
+    dtypes = {}
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if kind in "iu":
+            dtypes[col] = pd.to_numeric(series, downcast="integer").dtype
+        elif kind == "f":
+            values = series.dropna()
+            if values.empty:
+                continue
+            if values.abs().max() < 2**53 and (values == values.round()).all():
+                integers = pd.to_numeric(values.astype("int64"), downcast="integer")
+                dtypes[col] = (
+                    integers.dtype
+                    if len(values) == len(series)
+                    else pd.api.types.pandas_dtype(integers.dtype.name.capitalize())
+                )
+            elif (values.astype("float32") == values).all():
+                dtypes[col] = np.dtype("float32")
+        elif series.dtype == object and len(series):
+            if series.nunique() <= max_category_ratio * len(series):
+                dtypes[col] = "category"
+    dtypes = {col: dtype for col, dtype in dtypes.items() if dtype != df[col].dtype}
+    return df.astype(dtypes, copy=False) if dtypes else df
+
+
+class RunningStats:
+    """
+    Mean and (population) standard deviation of values seen in batches.
+
+    Batches are merged with the parallel variant of Welford's algorithm,
+    so the statistics of a column can be computed without holding it in
+    memory.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Add a batch of values.
+
+        Parameters:
+        values (np.ndarray): The values of the batch.
+        """
+        if not len(values):
+            return
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+        count = self.count + len(values)
+        delta = batch_mean - self.mean
+        self.mean += delta * len(values) / count
+        self._m2 += batch_m2 + delta**2 * self.count * len(values) / count
+        self.count = count
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self._m2 / self.count) if self.count else np.nan
+
+
+class Pipeline:
+    """
+    Plan and run a sequence of preprocessing steps on a DataFrame.
+
+    Steps are added with the chainable methods below and run in order, but
+    consecutive row filters (null values and outliers) are fused into a
+    single boolean mask, so the frame is indexed once instead of once per
+    step. Columns are converted and removed in place, and columns removed
+    before anything else are not read from the source at all. CSV files
+    larger than memory can be read in chunks (see ``read_csv``). Every run
+    records the duration and the resulting row count of each step in
+    ``report``.
+
+    The steps produce the same result as chaining ``get_categorical``,
+    ``process_null_values``, ``drop_outliers`` and ``remove_columns``.
+    """
+
+    _FILTERS = ("drop_nulls", "drop_outliers")
+
+    def __init__(self):
+        self._steps: list[tuple[str, dict]] = []
+        self.report: list[dict] = []
+
+    def categorical(self, columns: list) -> "Pipeline":
+        """
+        Convert columns to categorical type (see ``get_categorical``).
+        """
+        self._steps.append(("categorical", {"columns": list(columns)}))
+        return self
+
+    def drop_nulls(self) -> "Pipeline":
+        """
+        Remove rows with null values (see ``process_null_values``).
+        """
+        self._steps.append(("drop_nulls", {}))
+        return self
+
+    def drop_outliers(self, columns: list, threshold: int = 3) -> "Pipeline":
+        """
+        Remove rows whose Z-score is not below ``threshold`` in any of the
+        columns (see ``drop_outliers``).
+        """
+        self._steps.append(
+            ("drop_outliers", {"columns": list(columns), "threshold": threshold})
+        )
+        return self
+
+    def downcast(self, max_category_ratio: float = 0.5) -> "Pipeline":
+        """
+        Store columns in the smallest types holding their values (see
+        ``downcast_dtypes``). The report entry of this step also holds the
+        ``memory_before`` and ``memory_after`` the conversion, in bytes.
+        """
+        self._steps.append(("downcast", {"max_category_ratio": max_category_ratio}))
+        return self
+
+    def remove_columns(self, columns: list) -> "Pipeline":
+        """
+        Remove columns (see ``remove_columns``).
+        """
+        self._steps.append(("remove_columns", {"columns": list(columns)}))
+        return self
+
+    def fingerprint(self, **options) -> str:
+        """
+        Identify the data this pipeline prepares, to tell whether previously
+        prepared data can be reused.
+
+        Parameters:
+        **options: Other settings changing the result, e.g. the arguments
+                   of ``pd.read_csv``.
+
+        Returns:
+        str: A hex digest of the steps, their arguments, the options and
+             ``PREPARATION_VERSION``.
+        """
+        payload = json.dumps(
+            {"version": PREPARATION_VERSION, "steps": self._steps, "options": options},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def read_csv(self, path: str, chunksize: int | None = None, **kwargs) -> pd.DataFrame:
+        """
+        Read a CSV file and run the pipeline on it.
+
+        With ``chunksize``, the file is streamed instead of being loaded at
+        once: rows are filtered and unneeded columns dropped chunk by chunk,
+        so only the prepared data is held in memory. Outlier filters need
+        the mean and standard deviation of the rows they see, so every
+        ``drop_outliers`` step adds one pass over the file to compute them.
+
+        Parameters:
+        path (str): The path of the CSV file.
+        chunksize (int | None): The number of rows read at once. None reads
+                                the whole file at once.
+        **kwargs: Additional arguments of ``pd.read_csv``.
+
+        Returns:
+        pd.DataFrame: The prepared DataFrame.
+        """
+        # Leading column removals are done by not reading the columns
+        skipped = set()
+        steps = list(self._steps)
+        while steps and steps[0][0] == "remove_columns":
+            skipped.update(steps.pop(0)[1]["columns"])
+        if skipped:
+            header = pd.read_csv(path, nrows=0, **kwargs).columns
+            kwargs["usecols"] = [col for col in header if col not in skipped]
+        self.report = []
+        if chunksize is not None:
+            return self._read_csv_chunked(path, steps, chunksize, **kwargs)
+        start = time.perf_counter()
+        df = pd.read_csv(path, **kwargs)
+        self._record("read_csv", df, start)
+        return self._run_steps(df, steps)
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Run the pipeline on a DataFrame.
+
+        Parameters:
+        df (pd.DataFrame): The DataFrame to prepare. Categorical conversions
+                           are done in place, like in ``get_categorical``.
+
+        Returns:
+        pd.DataFrame: The prepared DataFrame.
+        """
+        self.report = []
+        return self._run_steps(df, self._steps)
+
+    def _run_steps(self, df: pd.DataFrame, steps: list) -> pd.DataFrame:
+        mask = None
+        for name, params in steps:
+            start = time.perf_counter()
+            if name in self._FILTERS:
+                if mask is None:
+                    mask = np.ones(len(df), dtype=bool)
+                getattr(self, f"_mask_{name}")(df, mask, **params)
+                self._record(name, df, start, rows=int(mask.sum()))
+                continue
+            if mask is not None:
+                df = self._apply_mask(df, mask)
+                mask = None
+                start = time.perf_counter()
+            memory = {}
+            if name == "categorical":
+                df[params["columns"]] = df[params["columns"]].astype("category")
+            elif name == "downcast":
+                memory["memory_before"] = int(df.memory_usage(deep=True).sum())
+                df = downcast_dtypes(df, **params)
+                memory["memory_after"] = int(df.memory_usage(deep=True).sum())
+            elif name == "remove_columns":
+                df = df.drop(columns=params["columns"])
+            self._record(name, df, start, **memory)
+        if mask is not None:
+            df = self._apply_mask(df, mask)
+        return df
+
+    def _read_csv_chunked(
+        self, path: str, steps: list, chunksize: int, **kwargs
+    ) -> pd.DataFrame:
+        # One pass per outlier filter, over the rows kept by the previous steps
+        outlier_stats = {}
+        for index, (name, params) in enumerate(steps):
+            if name != "drop_outliers":
+                continue
+            start = time.perf_counter()
+            running = {col: RunningStats() for col in params["columns"]}
+            rows = 0
+            for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+                mask = self._chunk_mask(chunk, steps[:index], outlier_stats)
+                for col, stats_ in running.items():
+                    stats_.update(chunk[col].to_numpy(dtype=float, na_value=np.nan)[mask])
+                rows += len(chunk)
+            outlier_stats[index] = {
+                col: (stats_.mean, stats_.std) for col, stats_ in running.items()
+            }
+            self._record("outlier_stats", None, start, rows=rows)
+
+        # Final pass: filter every chunk and keep only the remaining columns
+        start = time.perf_counter()
+        removed = [col for name, params in steps if name == "remove_columns"]
+        removed = [col for columns in removed for col in columns["columns"]]
+        categorical = {}
+        pieces = []
+        rows = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+            rows += len(chunk)
+            mask = self._chunk_mask(chunk, steps, outlier_stats, categorical)
+            piece = chunk.drop(columns=removed)[mask]
+            pieces.append(
+                piece.astype({col: "category" for col in categorical}, copy=False)
+            )
+        self._record("read_csv", None, start, rows=rows)
+
+        start = time.perf_counter()
+        dtypes = {
+            col: pd.CategoricalDtype(
+                pd.Index(np.concatenate(uniques)).unique().sort_values()
+            )
+            for col, uniques in categorical.items()
+        }
+        pieces = [piece.astype(dtypes, copy=False) for piece in pieces]
+        df = pd.concat(pieces) if pieces else pd.DataFrame()
+        del pieces
+        self._record("apply_filters", df, start)
+
+        for name, params in steps:
+            if name == "downcast":
+                start = time.perf_counter()
+                memory_before = int(df.memory_usage(deep=True).sum())
+                df = downcast_dtypes(df, **params)
+                self._record(
+                    name,
+                    df,
+                    start,
+                    memory_before=memory_before,
+                    memory_after=int(df.memory_usage(deep=True).sum()),
+                )
+        return df
+
+    def _chunk_mask(
+        self,
+        chunk: pd.DataFrame,
+        steps: list,
+        outlier_stats: dict,
+        categorical: dict | None = None,
+    ) -> np.ndarray:
+        mask = np.ones(len(chunk), dtype=bool)
+        removed = set()
+        for index, (name, params) in enumerate(steps):
+            if name == "categorical" and categorical is not None:
+                # Categories are the values seen by the step, like when run at once
+                for col in params["columns"]:
+                    categorical.setdefault(col, []).append(
+                        chunk.loc[mask, col].dropna().unique()
+                    )
+            elif name == "remove_columns":
+                removed.update(params["columns"])
+            elif name == "drop_nulls":
+                self._mask_drop_nulls(chunk.drop(columns=list(removed)), mask)
+            elif name == "drop_outliers":
+                for col in params["columns"]:
+                    mean, std = outlier_stats[index][col]
+                    values = chunk[col].to_numpy(dtype=float, na_value=np.nan)
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        z_scores = np.abs((values - mean) / std)
+                    mask &= z_scores < params["threshold"]
+        return mask
+
+    def _apply_mask(self, df: pd.DataFrame, mask: np.ndarray) -> pd.DataFrame:
+        start = time.perf_counter()
+        if not mask.all():
+            df = df[mask]
+        self._record("apply_filters", df, start)
+        return df
+
+    @staticmethod
+    def _mask_drop_nulls(df: pd.DataFrame, mask: np.ndarray) -> None:
+        for col in df.columns:
+            mask &= df[col].notna().to_numpy()
+
+    @staticmethod
+    def _mask_drop_outliers(
+        df: pd.DataFrame, mask: np.ndarray, columns: list, threshold: int
+    ) -> None:
+        # Z-scores are computed over the rows kept by the previous filters
+        kept = mask.copy()
+        for col in columns:
+            values = df[col].to_numpy(dtype=float, na_value=np.nan)
+            selected = values[kept]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                z_scores = np.abs((values - selected.mean()) / selected.std())
+            mask &= z_scores < threshold
+
+    def _record(
+        self,
+        step: str,
+        df: pd.DataFrame | None,
+        start: float,
+        rows: int | None = None,
+        **details,
+    ) -> None:
+        entry = {
+            "step": step,
+            "rows": len(df) if rows is None else rows,
+            "seconds": time.perf_counter() - start,
+            **details,
+        }
+        self.report.append(entry)
+
+    def format_report(self) -> str:
+        """
+        Return the report of the last run as a table.
+
+        Returns:
+        str: One line per step with its row count and duration (and memory
+             usage change for the ``downcast`` step).
+        """
+        lines = []
+        for entry in self.report:
+            line = (
+                f"{entry['step']:<16}{entry['rows']:>10} rows{entry['seconds']:>10.4f}s"
+            )
+            if "memory_before" in entry:
+                line += (
+                    f"{entry['memory_before'] / 1024:>10.0f} kB ->"
+                    f"{entry['memory_after'] / 1024:>8.0f} kB"
+                )
+            lines.append(line)
+        total = sum(entry["seconds"] for entry in self.report)
+        lines.append(f"{'total':<16}{'':>15}{total:>10.4f}s")
+        return "\n".join(lines)
+
+
+def downsample_grid(
+    df: pd.DataFrame, x: str, y: str, max_points: int, bins: int = 200, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Downsample a DataFrame for a scatter plot while preserving point density.
+
+    The (x, y) plane is split into a ``bins`` x ``bins`` grid and every
+    non-empty cell keeps a share of its points proportional to its size,
+    but at least one, so sparse regions and outliers remain visible.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to downsample.
+    x (str): The column plotted on the x axis.
+    y (str): The column plotted on the y axis.
+    max_points (int): The approximate number of rows to keep.
+    bins (int): The number of grid cells along each axis. Default is 200.
+    seed (int): Seed of the random choice of points within a cell.
+
+    Returns:
+    pd.DataFrame: The downsampled DataFrame, or ``df`` itself if it has no
+                  more than ``max_points`` rows.
+    """
+    if len(df) <= max_points:
+        return df
+
+    # Assign every row to a grid cell
+    x_values = df[x].to_numpy(dtype=float, na_value=np.nan)
+    y_values = df[y].to_numpy(dtype=float, na_value=np.nan)
+    x_bin = np.digitize(
+        x_values, np.linspace(np.nanmin(x_values), np.nanmax(x_values), bins)
+    )
+    y_bin = np.digitize(
+        y_values, np.linspace(np.nanmin(y_values), np.nanmax(y_values), bins)
+    )
+    cells = pd.Series(x_bin * (bins + 2) + y_bin)
+
+    # Keep a random subset of each cell, sized proportionally to the cell
+    order = np.random.default_rng(seed).permutation(len(df))
+    shuffled = cells.iloc[order].reset_index(drop=True)
+    rank = shuffled.groupby(shuffled).cumcount().to_numpy()
+    counts = shuffled.map(shuffled.value_counts()).to_numpy()
+    quota = np.maximum(1, np.round(counts * max_points / len(df)))
+    keep = np.sort(order[rank < quota])
+    return df.iloc[keep]
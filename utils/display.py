@@ -1,8 +1,158 @@
 import plotly.graph_objects as go
 
+from utils.constants import (
+    SCALE_OPTIONS,
+    SCALE_OPTIONS_BOTH_DISABLED,
+    SCALE_OPTIONS_LOG_DISABLED,
+)
+from utils.schema import DatasetSchema
+
 TITLE_FONT_SIZE = 24
 TITLE_X_SIZE = 0.5
 
+_NO_VALUE_OPTION = {"label": "(plot only one variable)", "value": "no_value"}
+_EMPTY_OPTION = {"label": "", "value": ""}
+# Options of the axis selectors of every plot type: a column kind of the
+# dataset schema stands for the options of all columns of that kind. Also
+# whether the y selector is disabled and whether each axis scale can change
+AXES_BY_PLOT_TYPE = {
+    "bar": {
+        "x": ["categorical"],
+        "y": [_NO_VALUE_OPTION],
+        "y_disabled": False,
+        "scales": (False, True),
+    },
+    "pie": {
+        "x": ["categorical"],
+        "y": [_EMPTY_OPTION],
+        "y_disabled": True,
+        "scales": (False, False),
+    },
+    "box": {
+        "x": [_NO_VALUE_OPTION, "categorical"],
+        "y": ["numeric"],
+        "y_disabled": False,
+        "scales": (False, True),
+    },
+    "histogram": {
+        "x": ["numeric"],
+        "y": [_EMPTY_OPTION],
+        "y_disabled": False,
+        "scales": (False, True),
+    },
+    "scatter": {
+        "x": ["numeric"],
+        "y": ["numeric"],
+        "y_disabled": False,
+        "scales": (True, True),
+    },
+}
+
+
+def _get_plot_axes(plot_type: str) -> dict:
+    try:
+        return AXES_BY_PLOT_TYPE[plot_type]
+    except KeyError:
+        raise ValueError("Something went wrong.") from None
+
+
+def get_axis_options(plot_type: str, schema: DatasetSchema) -> tuple[list, list, bool]:
+    """
+    Return the options of the x and y axis selectors of a plot.
+
+    Parameters:
+    plot_type (str): The type of the plot.
+    schema (DatasetSchema): The schema of the plotted dataset.
+
+    Returns:
+    tuple[list, list, bool]: The x and y options, and whether the y selector
+                             is disabled.
+
+    Raises:
+    ValueError: If the plot type is not recognized.
+    """
+    axes = _get_plot_axes(plot_type)
+    x_options, y_options = (
+        [
+            option
+            for item in axes[axis]
+            for option in (schema.options(item) if isinstance(item, str) else [item])
+        ]
+        for axis in ("x", "y")
+    )
+    return x_options, y_options, axes["y_disabled"]
+
+
+def get_scale_options(
+    plot_type: str, schema: DatasetSchema, x_axis: str | None, y_axis: str | None
+) -> tuple[list, list]:
+    """
+    Return the options of the x and y scale selectors of a plot.
+
+    The logarithmic scale is disabled on axes showing a column that is not
+    strictly positive, according to the dataset schema.
+
+    Parameters:
+    plot_type (str): The type of the plot.
+    schema (DatasetSchema): The schema of the plotted dataset.
+    x_axis (str | None): The selected x axis column.
+    y_axis (str | None): The selected y axis column.
+
+    Returns:
+    tuple[list, list]: The x and y scale options.
+
+    Raises:
+    ValueError: If the plot type is not recognized.
+    """
+    axes = _get_plot_axes(plot_type)
+    scale_options = []
+    for axis, column, enabled in zip(("x", "y"), (x_axis, y_axis), axes["scales"]):
+        if not enabled:
+            scale_options.append(SCALE_OPTIONS_BOTH_DISABLED)
+        elif "numeric" in axes[axis] and not schema.is_log_eligible(column):
+            scale_options.append(SCALE_OPTIONS_LOG_DISABLED)
+        else:
+            scale_options.append(SCALE_OPTIONS)
+    return tuple(scale_options)
+
+
+def get_scale_value(options: list, value: str | None) -> str:
+    """
+    Return the scale to select among the options of a scale selector.
+
+    The selected scale is kept unless it is disabled, the linear scale is
+    selected instead.
+
+    Parameters:
+    options (list): The options of the scale selector.
+    value (str | None): The selected scale.
+
+    Returns:
+    str: The scale to select.
+    """
+    enabled = [option["value"] for option in options if not option.get("disabled")]
+    return value if value in enabled else "linear"
+
+
+def get_axis_types(plot_type: str, x_scale: str, y_scale: str) -> tuple[str, str]:
+    """
+    Return the types of the x and y axes of a plot.
+
+    Bar and box plots have categories on the x axis, so it stays categorical
+    whatever the (disabled) x scale selector says.
+
+    Parameters:
+    plot_type (str): The type of the plot.
+    x_scale (str): The selected x axis scale.
+    y_scale (str): The selected y axis scale.
+
+    Returns:
+    tuple[str, str]: The x and y axis types.
+    """
+    if plot_type in ("bar", "box"):
+        return "category", y_scale
+    return x_scale, y_scale
+
 
 def update_plot_layouts(plot_type: str, fig: go.Figure, **kwargs):
     fig.update_layout(
@@ -10,8 +160,9 @@ def update_plot_layouts(plot_type: str, fig: go.Figure, **kwargs):
         title_x=TITLE_X_SIZE,
         template=kwargs["color_theme"],
     )
-    fig.update_xaxes(type=kwargs["x_scale"])
-    fig.update_yaxes(type=kwargs["y_scale"])
+    x_type, y_type = get_axis_types(plot_type, kwargs["x_scale"], kwargs["y_scale"])
+    fig.update_xaxes(type=x_type)
+    fig.update_yaxes(type=y_type)
     match plot_type:
         case "bar":
             fig.update_layout(
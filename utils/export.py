@@ -0,0 +1,412 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import Callable
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from data.get_data import get_dataset_fingerprint, get_dataset_mtime
+from utils.constants import (
+    EXPORT_QUEUE_SIZE,
+    EXPORT_TIMEOUT,
+    EXPORT_WORKERS,
+    FIGURE_VERSION,
+    IMAGE_CACHE_DISK_MAX_BYTES,
+    IMAGE_CACHE_MAX_BYTES,
+    IMAGE_CACHE_SPILL_DIR,
+)
+from utils.figures import build_figure
+from utils.logging import logger
+
+EXPORT_FORMATS = ("jpg", "png", "svg")
+
+
+class RendererPool:
+    """
+    Pool of warm Kaleido renderers shared by all image exports.
+
+    Every worker thread owns its own Kaleido (Chromium) process, started
+    once and reused for all renders, so exports neither pay the process
+    startup latency nor queue up behind a single renderer. At most
+    ``workers + queue_size`` exports are accepted at a time.
+
+    Parameters:
+    workers (int): The number of renderers running in parallel.
+    queue_size (int): The number of exports allowed to wait for a renderer.
+    timeout (float): Seconds to wait for a free slot and for a render.
+    """
+
+    def __init__(
+        self,
+        workers: int = EXPORT_WORKERS,
+        queue_size: int = EXPORT_QUEUE_SIZE,
+        timeout: float = EXPORT_TIMEOUT,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._start()
+        # Threads (and their renderers) do not survive a fork, e.g. when
+        # exports run as background jobs, so forked processes start afresh
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="kaleido"
+        )
+
+    def _get_scope(self):
+        if not hasattr(self._local, "scope"):
+            from kaleido.scopes.plotly import PlotlyScope
+
+            logger.info("Starting Kaleido renderer")
+            # Use the same plotly.js bundle and settings as plotly.io
+            defaults = pio.kaleido.scope
+            self._local.scope = PlotlyScope(
+                plotlyjs=defaults.plotlyjs,
+                mathjax=defaults.mathjax,
+                topojson=defaults.topojson,
+                mapbox_access_token=defaults.mapbox_access_token,
+            )
+        return self._local.scope
+
+    def _render(self, figure: dict, image_format: str) -> bytes:
+        return self._get_scope().transform(figure, format=image_format)
+
+    def render(self, fig: go.Figure, image_format: str) -> bytes:
+        """
+        Render a figure on the first free renderer.
+
+        Parameters:
+        fig (go.Figure): The figure to render.
+        image_format (str): The image format.
+
+        Returns:
+        bytes: The rendered image.
+
+        Raises:
+        TimeoutError: If the queue stays full or the render takes longer
+                      than ``timeout`` seconds.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Export queue is full.")
+        try:
+            future = self._executor.submit(self._render, fig.to_dict(), image_format)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is freed when the render ends, even if we stop waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise TimeoutError("Export timed out.") from None
+
+    def warm_up(self) -> None:
+        """
+        Start all renderers now instead of on their first export.
+        """
+        barrier = threading.Barrier(self.workers)
+
+        def start() -> None:
+            # Keep each worker busy until all of them are started
+            barrier.wait(timeout=self.timeout)
+            self._render(go.Figure().to_dict(), "svg")
+
+        futures = [self._executor.submit(start) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+
+renderer_pool = RendererPool()
+
+
+def _get_image_prefix(dataset_key: str) -> str:
+    # Keys start with the dataset, so its images can be dropped together
+    return re.sub(r"\W+", "_", dataset_key.lower()) + "-"
+
+
+class ImageCache:
+    """
+    Bounded LRU cache of rendered images, with optional spill to disk.
+
+    Images evicted from memory are written to ``spill_dir`` (if set) and
+    served from there until the directory itself exceeds its size limit,
+    at which point the least recently used files are removed.
+
+    Parameters:
+    max_bytes (int): The total size of the images kept in memory.
+    spill_dir (str | None): The directory receiving evicted images. None
+                            disables the disk cache.
+    max_disk_bytes (int): The total size of the images kept on disk.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+        spill_dir: str | None = IMAGE_CACHE_SPILL_DIR,
+        max_disk_bytes: int = IMAGE_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Return the cached image, or None if it is not cached.
+
+        Parameters:
+        key (str): The key returned by ``get_image_key``.
+
+        Returns:
+        bytes | None: The cached image.
+        """
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+        if self.spill_dir is None:
+            return None
+        path = os.path.join(self.spill_dir, key)
+        try:
+            with open(path, "rb") as f:
+                image = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        self.put(key, image, on_disk=True)
+        return image
+
+    def put(self, key: str, image: bytes, on_disk: bool = False) -> None:
+        """
+        Add an image to the cache, evicting the least recently used ones.
+
+        Parameters:
+        key (str): The key returned by ``get_image_key``.
+        image (bytes): The rendered image.
+        on_disk (bool): Whether the image was read from disk, so it is not
+                        written again if it is evicted right away. Other
+                        evicted images are still written.
+        """
+        evicted = []
+        with self._lock:
+            if key in self._images:
+                self._size -= len(self._images.pop(key))
+            self._images[key] = image
+            self._size += len(image)
+            while self._size > self.max_bytes and self._images:
+                evicted_key, evicted_image = self._images.popitem(last=False)
+                self._size -= len(evicted_image)
+                evicted.append((evicted_key, evicted_image))
+        if self.spill_dir is not None:
+            for evicted_key, evicted_image in evicted:
+                if not (on_disk and evicted_key == key):
+                    self._spill(evicted_key, evicted_image)
+
+    def _spill(self, key: str, image: bytes) -> None:
+        path = os.path.join(self.spill_dir, key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+            files = [entry for entry in os.scandir(self.spill_dir) if entry.is_file()]
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            disk_size = sum(entry.stat().st_size for entry in files)
+            while files and disk_size > self.max_disk_bytes:
+                oldest = files.pop(0)
+                disk_size -= oldest.stat().st_size
+                os.remove(oldest.path)
+        except OSError as e:
+            logger.warning(f"Could not spill image to {self.spill_dir}: {e}")
+
+    def invalidate(self, dataset_key: str | None = None) -> None:
+        """
+        Drop the cached images of a dataset, in memory and on disk.
+
+        Parameters:
+        dataset_key (str | None): The normalized dataset name. If None, every
+                                  image is dropped.
+        """
+        if dataset_key is None:
+            self.clear()
+            return
+        prefix = _get_image_prefix(dataset_key)
+        with self._lock:
+            for key in [key for key in self._images if key.startswith(prefix)]:
+                self._size -= len(self._images.pop(key))
+        if self.spill_dir is not None:
+            for entry in os.scandir(self.spill_dir):
+                if entry.is_file() and entry.name.startswith(prefix):
+                    os.remove(entry.path)
+
+    def clear(self) -> None:
+        """
+        Drop all cached images, in memory and on disk.
+        """
+        with self._lock:
+            self._images.clear()
+            self._size = 0
+        if self.spill_dir is not None:
+            for entry in os.scandir(self.spill_dir):
+                if entry.is_file():
+                    os.remove(entry.path)
+
+
+image_cache = ImageCache()
+
+
+def get_image_key(
+    figure_spec: dict,
+    image_format: str,
+    dataset_mtime: float | None,
+    dataset_fingerprint: str | None = None,
+) -> str:
+    """
+    Compute a stable cache key of a rendered figure.
+
+    The dataset source and preparation are the same in every process and
+    across restarts, so images spilled to disk are shared by all workers
+    but not reused once the data they show changed. ``FIGURE_VERSION`` is
+    included as well, for changes to the figures themselves.
+
+    Parameters:
+    figure_spec (dict): The full spec of the figure, style included.
+    image_format (str): The image format.
+    dataset_mtime (float | None): The modification time of the dataset source.
+    dataset_fingerprint (str | None): The fingerprint of the preparation of
+                                      the dataset.
+
+    Returns:
+    str: The normalized dataset name followed by a SHA-256 digest.
+    """
+    payload = json.dumps(
+        {
+            "spec": figure_spec,
+            "format": image_format,
+            "mtime": dataset_mtime,
+            "fingerprint": dataset_fingerprint,
+            "figure_version": FIGURE_VERSION,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return _get_image_prefix(figure_spec["dataset_key"]) + digest
+
+
+def get_export_filename(figure_spec: dict, image_format: str) -> str:
+    """
+    Build a unique, descriptive file name for an exported figure.
+
+    Parameters:
+    figure_spec (dict): The spec the figure was built from.
+    image_format (str): The image format (see ``EXPORT_FORMATS``).
+
+    Returns:
+    str: A file name such as ``scatter_price_sqft_20240101-120000_1a2b3c4d.png``.
+    """
+    parts = [figure_spec["plot_type"], figure_spec["x_axis"], figure_spec["y_axis"]]
+    name = "_".join(re.sub(r"[^\w-]+", "-", str(part)) for part in parts if part)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return f"{name}_{timestamp}_{uuid.uuid4().hex[:8]}.{image_format}"
+
+
+def export_figure(fig: go.Figure, image_format: str) -> bytes:
+    """
+    Render a figure to an image in memory, using the shared renderer pool.
+
+    Parameters:
+    fig (go.Figure): The figure to render.
+    image_format (str): The image format (see ``EXPORT_FORMATS``).
+
+    Returns:
+    bytes: The rendered image.
+
+    Raises:
+    ValueError: If the image format is not supported.
+    TimeoutError: If the export could not be completed in time.
+    """
+    if image_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    return renderer_pool.render(fig, image_format)
+
+
+def export_figure_spec(figure_spec: dict, image_format: str) -> bytes:
+    """
+    Render the figure described by a spec, reusing previously rendered images.
+
+    Parameters:
+    figure_spec (dict): The keyword arguments of ``build_figure``.
+    image_format (str): The image format (see ``EXPORT_FORMATS``).
+
+    Returns:
+    bytes: The rendered image.
+
+    Raises:
+    ValueError: If the image format is not supported.
+    TimeoutError: If the export could not be completed in time.
+    """
+    dataset_key = figure_spec["dataset_key"]
+    key = get_image_key(
+        figure_spec,
+        image_format,
+        get_dataset_mtime(dataset_key),
+        get_dataset_fingerprint(dataset_key),
+    )
+    image = image_cache.get(key)
+    if image is None:
+        image = export_figure(build_figure(**figure_spec), image_format)
+        image_cache.put(key, image)
+    return image
+
+
+def export_figure_zip(
+    figure_spec: dict,
+    image_formats: tuple = EXPORT_FORMATS,
+    progress: Callable[[int, str], None] | None = None,
+) -> bytes:
+    """
+    Render the figure described by a spec in several formats into a zip file.
+
+    Parameters:
+    figure_spec (dict): The keyword arguments of ``build_figure``.
+    image_formats (tuple): The image formats to include.
+    progress (Callable | None): Called with the number of rendered images
+                                and the format being rendered next.
+
+    Returns:
+    bytes: The zip archive, with one ``figure.<format>`` file per format.
+
+    Raises:
+    ValueError: If an image format is not supported.
+    TimeoutError: If an export could not be completed in time.
+    """
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for done, image_format in enumerate(image_formats):
+            if progress is not None:
+                progress(done, image_format)
+            archive.writestr(
+                f"figure.{image_format}", export_figure_spec(figure_spec, image_format)
+            )
+    return buffer.getvalue()
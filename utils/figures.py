@@ -0,0 +1,487 @@
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import diskcache
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from data.get_data import (
+    get_dataframe_to_plot,
+    get_dataset_fingerprint,
+    get_dataset_mtime,
+)
+from data_queries.aggregations import (
+    get_box_stats,
+    get_frequency_table,
+    get_histogram,
+    get_scatter_points,
+    get_trendline,
+)
+from utils.constants import (
+    DEFAULT_NBINS,
+    FAST_FIGURE_JSON,
+    FIGURE_CACHE_MAX_BYTES,
+    FIGURE_CACHE_SHARED_DIR,
+    FIGURE_CACHE_SHARED_MAX_BYTES,
+    FIGURE_VERSION,
+    SCATTER_WEBGL_THRESHOLD,
+)
+from utils.display import update_plot_layouts
+from utils.logging import logger
+from utils.metrics import record_cache_lookup, stage
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+# Integer types understood by plotly.js typed arrays, from the smallest
+_TYPED_ARRAY_INT_DTYPES = ("u1", "i1", "u2", "i2", "u4", "i4")
+# Shorter arrays are left as JSON lists, base64 does not pay off for them
+_TYPED_ARRAY_MIN_SIZE = 64
+
+
+def build_figure(
+    dataset_key: str,
+    plot_type: str,
+    x_axis: str,
+    y_axis: str,
+    trendline: bool,
+    nbins: int | None,
+    x_scale: str,
+    y_scale: str,
+    color_theme: str,
+) -> go.Figure:
+    """
+    Build the figure displayed for the given selection.
+
+    Parameters:
+    dataset_key (str): The name of the dataset to plot.
+    plot_type (str): The type of the plot (see ``PLOT_TYPES``).
+    x_axis (str): The column plotted on the x axis.
+    y_axis (str): The column plotted on the y axis, if any.
+    trendline (bool): Whether to draw an OLS trendline on scatter plots.
+    nbins (int | None): The number of histogram bins.
+    x_scale (str): The x axis scale.
+    y_scale (str): The y axis scale.
+    color_theme (str): The name of the plotly template.
+
+    Returns:
+    go.Figure: The figure.
+
+    Raises:
+    ValueError: If the plot type is not recognized.
+    """
+    # plotly.express is slow to import, so it is only imported on first use
+    import plotly.express as px
+
+    df, _ = get_dataframe_to_plot(dataset_key)
+    if plot_type == "bar":
+        # bar plot (1 variable - categorical)
+        df_count = get_frequency_table(dataset_key, x_axis)
+        fig = px.bar(df_count, x=x_axis, y="count")
+        update_plot_layouts(
+            plot_type,
+            fig,
+            x_axis=x_axis,
+            y_axis=y_axis,
+            x_scale=x_scale,
+            y_scale=y_scale,
+            color_theme=color_theme,
+        )
+
+    elif plot_type == "pie":
+        # pie plot (1 variable - categorical)
+        df_count = get_frequency_table(dataset_key, x_axis)
+
+        fig = px.pie(
+            df_count,
+            names=x_axis,
+            values="count",
+        )
+
+        update_plot_layouts(
+            plot_type,
+            fig,
+            x_axis=x_axis,
+            y_axis=y_axis,
+            x_scale=x_scale,
+            y_scale=y_scale,
+            color_theme=color_theme,
+        )
+    elif plot_type == "box":
+        # box plot (2 variables - categorical + continuous), or (1 variable -
+        # continuous) when no category is selected. Statistics are computed on
+        # the server so that only a few numbers per box are sent to the browser
+        if x_axis not in df.columns:
+            x_axis = None
+        stats = get_box_stats(dataset_key, y_axis, x_axis)
+        fig = go.Figure(
+            go.Box(
+                x=stats.index,
+                q1=stats["q1"],
+                median=stats["median"],
+                q3=stats["q3"],
+                lowerfence=stats["lowerfence"],
+                upperfence=stats["upperfence"],
+                # Only the outliers are sent as sample points
+                y=stats["outliers"].tolist(),
+                boxpoints="outliers",
+                name=y_axis,
+            )
+        )
+        update_plot_layouts(
+            plot_type,
+            fig,
+            x_axis=x_axis,
+            y_axis=y_axis,
+            x_scale=x_scale,
+            y_scale=y_scale,
+            color_theme=color_theme,
+        )
+    elif plot_type == "scatter":
+        # scatter plot (2 variables - continuous + continuous)
+        df_points = get_scatter_points(dataset_key, x_axis, y_axis)
+        # Large plots are drawn with WebGL, and labels would only clutter them
+        if len(df_points) > SCATTER_WEBGL_THRESHOLD:
+            scatter_kwargs = {"render_mode": "webgl"}
+        else:
+            scatter_kwargs = {"text": x_axis}
+        fig = px.scatter(df_points, x=x_axis, y=y_axis, **scatter_kwargs)
+        fit = get_trendline(dataset_key, x_axis, y_axis) if trendline else None
+        if fit is not None:
+            fig.add_trace(
+                go.Scatter(
+                    x=fit["x"],
+                    y=fit["y"],
+                    mode="lines",
+                    line_color="red",
+                    name="OLS trendline",
+                    showlegend=False,
+                    hovertemplate=f"<b>OLS trendline</b><br>{y_axis} = "
+                    f"{fit['slope']:.6g} * {x_axis} + {fit['intercept']:.6g}<br>"
+                    f"R<sup>2</sup>={fit['r_squared']:.6f}<extra></extra>",
+                )
+            )
+        update_plot_layouts(
+            plot_type,
+            fig,
+            x_axis=x_axis,
+            y_axis=y_axis,
+            x_scale=x_scale,
+            y_scale=y_scale,
+            color_theme=color_theme,
+        )
+
+    elif plot_type == "histogram":
+        # histogram (1 variable - continuous), binned on the server so that only
+        # the bins are sent to the browser
+        counts, edges = get_histogram(dataset_key, x_axis, nbins or DEFAULT_NBINS)
+        fig = go.Figure(
+            go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                customdata=np.column_stack([edges[:-1], edges[1:]]),
+                hovertemplate=f"{x_axis}=%{{customdata[0]}} - %{{customdata[1]}}"
+                "<br>count=%{y}<extra></extra>",
+            )
+        )
+        fig.update_layout(bargap=0)
+        update_plot_layouts(
+            plot_type,
+            fig,
+            x_axis=x_axis,
+            y_axis=y_axis,
+            x_scale=x_scale,
+            y_scale=y_scale,
+            color_theme=color_theme,
+        )
+
+    else:
+        raise ValueError("Wrong plot type.")
+    return fig
+
+
+def _get_payload_size(obj: object) -> int:
+    # Approximate size of a figure payload, without encoding it
+    if isinstance(obj, dict):
+        return sum(len(key) + _get_payload_size(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(_get_payload_size(value) for value in obj)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    return 8
+
+
+class FigureCache:
+    """
+    Thread-safe LRU cache of figure payloads, bounded by their size.
+
+    Payloads (see ``to_figure_payload``) are kept in memory by each worker
+    and, if ``shared_dir`` is set, also stored as JSON in a disk cache shared
+    by all worker processes on the host. Cached payloads are shared between
+    callers and must be treated as read-only.
+
+    Parameters:
+    max_bytes (int): The total size of the payloads kept in memory.
+    shared_dir (str | None): The directory of the shared cache. None
+                             disables it.
+    max_shared_bytes (int): The total size of the shared cache.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = FIGURE_CACHE_MAX_BYTES,
+        shared_dir: str | None = FIGURE_CACHE_SHARED_DIR,
+        max_shared_bytes: int = FIGURE_CACHE_SHARED_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self._figures: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._shared = (
+            None
+            if shared_dir is None
+            else diskcache.Cache(shared_dir, size_limit=max_shared_bytes)
+        )
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the cached payload, or None if it is not cached.
+
+        Parameters:
+        key (str): The key returned by ``get_figure_key``.
+
+        Returns:
+        dict | None: The cached payload.
+        """
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup("figure", True)
+                return self._figures[key][0]
+        payload_json = None if self._shared is None else self._shared.get(key)
+        if payload_json is None:
+            with self._lock:
+                self.misses += 1
+            record_cache_lookup("figure", False)
+            return None
+        payload = json.loads(payload_json)
+        self._put_local(key, payload, len(payload_json))
+        with self._lock:
+            self.shared_hits += 1
+        record_cache_lookup("figure", "shared_hit")
+        return payload
+
+    def put(self, key: str, payload: dict) -> None:
+        """
+        Add a payload to the cache, evicting the least recently used ones.
+
+        Parameters:
+        key (str): The key returned by ``get_figure_key``.
+        payload (dict): The payload returned by ``to_figure_payload``.
+        """
+        self._put_local(key, payload, _get_payload_size(payload))
+        if self._shared is not None:
+            try:
+                self._shared.set(key, pio.json.to_json_plotly(payload))
+            except Exception as e:
+                logger.warning(f"Could not store figure in shared cache: {e}")
+
+    def _put_local(self, key: str, payload: dict, size: int) -> None:
+        with self._lock:
+            if key in self._figures:
+                self._size -= self._figures.pop(key)[1]
+            self._figures[key] = (payload, size)
+            self._size += size
+            while self._size > self.max_bytes and self._figures:
+                self._size -= self._figures.popitem(last=False)[1][1]
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        Returns:
+        dict: The number of ``hits`` (in memory), ``shared_hits``, ``misses``,
+              cached ``entries`` and their size in ``bytes``.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "entries": len(self._figures),
+                "bytes": self._size,
+            }
+
+    def clear(self) -> None:
+        """
+        Drop all cached payloads, including the shared ones, and reset counters.
+        """
+        with self._lock:
+            self._figures.clear()
+            self._size = 0
+            self.hits = self.shared_hits = self.misses = 0
+        if self._shared is not None:
+            self._shared.clear()
+
+
+figure_cache = FigureCache()
+
+
+def get_figure_key(figure_spec: dict) -> str:
+    """
+    Build the cache key of a figure.
+
+    The key includes the modification time of the dataset source, the
+    fingerprint of its preparation and ``FIGURE_VERSION``. They are the same
+    in every process and across restarts, so figures are rebuilt after any
+    of them changed, including by workers sharing the cache.
+
+    Parameters:
+    figure_spec (dict): The keyword arguments of ``build_figure``.
+
+    Returns:
+    str: A hex digest identifying the figure.
+    """
+    dataset_key = figure_spec["dataset_key"]
+    payload = json.dumps(
+        {
+            "spec": figure_spec,
+            "mtime": get_dataset_mtime(dataset_key),
+            "fingerprint": get_dataset_fingerprint(dataset_key),
+            "figure_version": FIGURE_VERSION,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_figure(**figure_spec) -> dict:
+    """
+    Retrieve the payload of the figure for the given selection, building and
+    encoding the figure only if needed.
+
+    Parameters:
+    **figure_spec: The keyword arguments of ``build_figure``.
+
+    Returns:
+    dict: The payload returned by ``to_figure_payload``, shared with other
+          callers (read-only).
+
+    Raises:
+    ValueError: If the dataset or the plot type is not recognized.
+    """
+    key = get_figure_key(figure_spec)
+    payload = figure_cache.get(key)
+    if payload is None:
+        with stage("figure_build"):
+            fig = build_figure(**figure_spec)
+        payload = to_figure_payload(fig)
+        figure_cache.put(key, payload)
+    return payload
+
+
+def configure_json_engine() -> str:
+    """
+    Select the JSON engine of plotly, which Dash also uses for responses.
+
+    With ``FAST_FIGURE_JSON`` enabled, orjson is used when it is installed,
+    which encodes NumPy arrays natively instead of converting them to lists.
+
+    Returns:
+    str: The configured engine.
+    """
+    if FAST_FIGURE_JSON:
+        if orjson is not None:
+            pio.json.config.default_engine = "orjson"
+        else:
+            logger.warning("orjson is not installed, figures are encoded with json")
+    return pio.json.config.default_engine
+
+
+def encode_typed_array(values: np.ndarray) -> dict:
+    """
+    Encode a numeric array as a plotly.js typed array.
+
+    Integers are stored in the smallest type holding all of their values and
+    floats in single precision when it loses nothing.
+
+    Parameters:
+    values (np.ndarray): The numeric array.
+
+    Returns:
+    dict: The ``dtype``, base64 encoded ``bdata`` and, for 2-D arrays, the
+          ``shape`` of the array.
+    """
+    if values.dtype.kind in "iu":
+        low, high = values.min(), values.max()
+        dtype = next(
+            (
+                dtype
+                for dtype in _TYPED_ARRAY_INT_DTYPES
+                if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max
+            ),
+            "f8",
+        )
+    else:
+        single = values.astype("f4")
+        dtype = "f4" if np.array_equal(single, values, equal_nan=True) else "f8"
+    encoded = {
+        "dtype": dtype,
+        "bdata": base64.b64encode(np.ascontiguousarray(values, dtype=dtype)).decode(),
+    }
+    if values.ndim > 1:
+        encoded["shape"] = ",".join(map(str, values.shape))
+    return encoded
+
+
+def _encode_arrays(obj: object) -> object:
+    if isinstance(obj, dict):
+        return {key: _encode_arrays(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_encode_arrays(value) for value in obj]
+    if (
+        isinstance(obj, np.ndarray)
+        and obj.dtype.kind in "iuf"
+        and obj.ndim <= 2
+        and obj.size >= _TYPED_ARRAY_MIN_SIZE
+    ):
+        return encode_typed_array(obj)
+    return obj
+
+
+@stage("serialization")
+def to_figure_payload(fig: go.Figure) -> dict:
+    """
+    Prepare a figure to be returned by a callback.
+
+    With ``FAST_FIGURE_JSON`` enabled, the numeric arrays of the traces are
+    sent as base64 typed arrays, which are smaller and faster to encode
+    than JSON numbers.
+
+    Parameters:
+    fig (go.Figure): The figure.
+
+    Returns:
+    dict: The dictionary of the figure.
+    """
+    payload = fig.to_plotly_json()
+    if FAST_FIGURE_JSON:
+        payload["data"] = _encode_arrays(payload["data"])
+    return payload
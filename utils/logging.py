@@ -2,8 +2,10 @@ import logging
 
 from rich.logging import RichHandler
 
+from utils.constants import LOG_LEVEL
+
 _FORMAT = "%(message)s"
 logging.basicConfig(
-    level="NOTSET", format=_FORMAT, datefmt="[%X]", handlers=[RichHandler()]
+    level=LOG_LEVEL, format=_FORMAT, datefmt="[%X]", handlers=[RichHandler()]
 )
 logger = logging.getLogger("rich")
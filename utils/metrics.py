@@ -0,0 +1,184 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from flask import Flask, Response, g, has_request_context
+
+from utils.constants import METRICS_LATENCY_BUCKETS, METRICS_PAYLOAD_BUCKETS
+from utils.logging import logger
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - prometheus_client is an optional dependency
+    prometheus_client = None
+
+# Stages of a callback: loading datasets, computing aggregations, building
+# figures and encoding them, the rest of the callback, and the time spent by
+# Dash outside of the callback (mostly encoding the response)
+STAGES = (
+    "data_fetch",
+    "aggregation",
+    "figure_build",
+    "serialization",
+    "other",
+    "response",
+)
+
+if prometheus_client is not None:
+    CALLBACK_LATENCY = prometheus_client.Histogram(
+        "callback_latency_seconds",
+        "Duration of Dash callbacks.",
+        ["callback"],
+        buckets=METRICS_LATENCY_BUCKETS,
+    )
+    CALLBACK_STAGE_LATENCY = prometheus_client.Histogram(
+        "callback_stage_latency_seconds",
+        "Duration of the stages of Dash callbacks, excluding nested stages.",
+        ["callback", "stage"],
+        buckets=METRICS_LATENCY_BUCKETS,
+    )
+    CALLBACK_ERRORS = prometheus_client.Counter(
+        "callback_errors_total", "Dash callbacks raising an exception.", ["callback"]
+    )
+    CALLBACK_RESPONSE_SIZE = prometheus_client.Histogram(
+        "callback_response_bytes",
+        "Size of the responses of Dash callbacks.",
+        ["callback"],
+        buckets=METRICS_PAYLOAD_BUCKETS,
+    )
+    CACHE_LOOKUPS = prometheus_client.Counter(
+        "cache_lookups_total", "Lookups in the app caches.", ["cache", "result"]
+    )
+
+# Callback running in the current thread and time spent in its open stages
+_local = threading.local()
+
+
+def timed_callback(func: Callable) -> Callable:
+    """
+    Decorate a Dash callback to record its latency and stage breakdown.
+
+    Parameters:
+    func (Callable): The callback function.
+
+    Returns:
+    Callable: The instrumented function.
+    """
+    if prometheus_client is None:
+        return func
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _local.callback, _local.stages = name, [0.0]
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            CALLBACK_ERRORS.labels(name).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            CALLBACK_LATENCY.labels(name).observe(elapsed)
+            CALLBACK_STAGE_LATENCY.labels(name, "other").observe(
+                elapsed - _local.stages[0]
+            )
+            _local.callback = None
+            if has_request_context():
+                g.metrics_callback, g.metrics_callback_seconds = name, elapsed
+
+    return wrapper
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Record the duration of a stage of the running callback.
+
+    Usable as a context manager or a decorator. Stages may be nested, the
+    time of a nested stage is only counted for it. Outside of callbacks
+    nothing is recorded.
+
+    Parameters:
+    name (str): The name of the stage (see ``STAGES``).
+    """
+    callback = getattr(_local, "callback", None)
+    if callback is None:
+        yield
+        return
+    _local.stages.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _local.stages.pop()
+        _local.stages[-1] += elapsed
+        CALLBACK_STAGE_LATENCY.labels(callback, name).observe(elapsed - nested)
+
+
+def record_cache_lookup(cache: str, hit: bool | str) -> None:
+    """
+    Count a lookup in one of the app caches.
+
+    Parameters:
+    cache (str): The name of the cache.
+    hit (bool | str): Whether the lookup was a hit, or the kind of hit.
+    """
+    if prometheus_client is None:
+        return
+    result = hit if isinstance(hit, str) else ("hit" if hit else "miss")
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def _start_request_timer() -> None:
+    g.metrics_start = time.perf_counter()
+
+
+def _record_response(response: Response) -> Response:
+    callback = g.pop("metrics_callback", None)
+    start = g.pop("metrics_start", None)
+    if callback is None or start is None:
+        return response
+    elapsed = time.perf_counter() - start - g.pop("metrics_callback_seconds")
+    CALLBACK_STAGE_LATENCY.labels(callback, "response").observe(max(elapsed, 0))
+    size = response.calculate_content_length()
+    if size is not None:
+        CALLBACK_RESPONSE_SIZE.labels(callback).observe(size)
+    return response
+
+
+def _get_registry():
+    # With several worker processes, prometheus_client writes the metrics of
+    # every process in PROMETHEUS_MULTIPROC_DIR, and they are merged here
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def register_metrics(server: Flask) -> None:
+    """
+    Serve the metrics in the Prometheus format on ``/metrics``, and record
+    the size of the callback responses.
+
+    Parameters:
+    server (Flask): The server of the Dash app.
+    """
+    if prometheus_client is None:
+        logger.warning("prometheus_client is not installed, /metrics is disabled")
+        return
+    server.before_request(_start_request_timer)
+    server.after_request(_record_response)
+
+    @server.route("/metrics")
+    def metrics() -> Response:
+        return Response(
+            prometheus_client.generate_latest(_get_registry()),
+            content_type=prometheus_client.CONTENT_TYPE_LATEST,
+        )
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+# Kinds of columns: "numeric" columns can be plotted on continuous axes,
+# "categorical" ones on category axes, and "other" ones (e.g. free text) are
+# not offered on any axis
+COLUMN_KINDS = ("numeric", "categorical", "other")
+
+
+def _to_python(value) -> float | int | None:
+    """
+    Convert a NumPy scalar to a JSON-serializable Python number.
+    """
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ColumnSchema:
+    """
+    Metadata of a column of a prepared dataset.
+
+    Parameters:
+    name (str): The name of the column.
+    kind (str): The kind of the column (see ``COLUMN_KINDS``).
+    dtype (str): The name of the column's data type.
+    cardinality (int): The number of distinct non-null values.
+    nulls (int): The number of null values.
+    minimum (float | None): The smallest value of numeric columns.
+    maximum (float | None): The largest value of numeric columns.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        dtype: str,
+        cardinality: int,
+        nulls: int,
+        minimum: float | None = None,
+        maximum: float | None = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.dtype = dtype
+        self.cardinality = cardinality
+        self.nulls = nulls
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __repr__(self) -> str:
+        return f"ColumnSchema(name={self.name!r}, kind={self.kind!r})"
+
+    @property
+    def log_eligible(self) -> bool:
+        """
+        Whether the column can be plotted on a logarithmic axis, i.e. it is
+        numeric and all of its values are positive.
+        """
+        return self.kind == "numeric" and self.minimum is not None and self.minimum > 0
+
+    @classmethod
+    def from_series(cls, series: pd.Series, categorical: bool) -> "ColumnSchema":
+        """
+        Compute the metadata of a column.
+
+        Parameters:
+        series (pd.Series): The column.
+        categorical (bool): Whether the column is one of the dataset's
+                            categorical columns.
+
+        Returns:
+        ColumnSchema: The column metadata.
+        """
+        if categorical:
+            kind = "categorical"
+        elif pd.api.types.is_numeric_dtype(series.dtype) and not (
+            pd.api.types.is_bool_dtype(series.dtype)
+        ):
+            kind = "numeric"
+        else:
+            kind = "other"
+        minimum = maximum = None
+        if kind == "numeric":
+            minimum, maximum = _to_python(series.min()), _to_python(series.max())
+        return cls(
+            name=series.name,
+            kind=kind,
+            dtype=str(series.dtype),
+            cardinality=int(series.nunique()),
+            nulls=int(series.isna().sum()),
+            minimum=minimum,
+            maximum=maximum,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Return the metadata as a JSON-serializable dict.
+        """
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "dtype": self.dtype,
+            "cardinality": self.cardinality,
+            "nulls": self.nulls,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+        }
+
+
+class DatasetSchema:
+    """
+    Metadata of the columns of a prepared dataset, computed once per load.
+
+    The selector options of every column kind are built up front, so the
+    option callbacks do not iterate over the dataset columns.
+
+    Parameters:
+    columns (list[ColumnSchema]): The metadata of the columns, in order.
+    rows (int): The number of rows of the dataset.
+    """
+
+    def __init__(self, columns: list[ColumnSchema], rows: int):
+        self.rows = rows
+        self.columns = {column.name: column for column in columns}
+        self._options = {
+            kind: [
+                {"label": column.name, "value": column.name}
+                for column in columns
+                if column.kind == kind
+            ]
+            for kind in COLUMN_KINDS
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    @property
+    def numeric(self) -> list[str]:
+        return [option["value"] for option in self._options["numeric"]]
+
+    @property
+    def categorical(self) -> list[str]:
+        return [option["value"] for option in self._options["categorical"]]
+
+    def options(self, kind: str) -> list[dict]:
+        """
+        Return the selector options of the columns of a kind.
+
+        Parameters:
+        kind (str): The kind of the columns (see ``COLUMN_KINDS``).
+
+        Returns:
+        list[dict]: One ``label``/``value`` option per column, in order. The
+                    list is a copy and can be modified.
+        """
+        return list(self._options[kind])
+
+    def is_log_eligible(self, name: str) -> bool:
+        """
+        Check whether a column can be plotted on a logarithmic axis.
+
+        Parameters:
+        name (str): The name of the column.
+
+        Returns:
+        bool: False for columns with non-positive values or that are not
+              numeric, True otherwise (including for unknown columns, e.g.
+              placeholder selections).
+        """
+        column = self.columns.get(name)
+        return column is None or column.log_eligible
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, cat_columns: list) -> "DatasetSchema":
+        """
+        Compute the schema of a prepared dataset.
+
+        Parameters:
+        df (pd.DataFrame): The prepared DataFrame.
+        cat_columns (list): The categorical columns of the dataset.
+
+        Returns:
+        DatasetSchema: The schema.
+        """
+        return cls(
+            [ColumnSchema.from_series(df[col], col in cat_columns) for col in df.columns],
+            rows=len(df),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Return the schema as a JSON-serializable dict.
+        """
+        return {
+            "rows": self.rows,
+            "columns": [column.to_dict() for column in self.columns.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatasetSchema":
+        """
+        Rebuild a schema from the dict returned by ``to_dict``.
+
+        Parameters:
+        data (dict): The schema as a dict.
+
+        Returns:
+        DatasetSchema: The schema.
+        """
+        return cls([ColumnSchema(**column) for column in data["columns"]], data["rows"])
@@ -0,0 +1,121 @@
+import glob
+import os
+import re
+from typing import Callable
+
+import pandas as pd
+
+from utils.columnar_cache import feather, read_frame, write_frame
+from utils.constants import SHARED_DATASETS_DIR
+from utils.logging import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - file locks are only available on POSIX
+    fcntl = None
+
+SHARED_SUFFIX = ".arrow"
+
+
+class SharedDatasetStore:
+    """
+    Prepared datasets published once in shared memory and attached by every
+    process as read-only views.
+
+    Each dataset version is an Arrow IPC file in ``directory``, which should
+    live in a RAM-backed file system such as ``/dev/shm``. Processes
+    memory-map it, so N worker processes hold a single copy of the data
+    instead of N. Files are named after the dataset key and a version token
+    (the source modification time), so a changed source is published as a
+    new file and processes still using the previous one keep their view.
+
+    Parameters:
+    directory (str | None): The directory of the published datasets. None
+                            disables the store: datasets are loaded in
+                            every process.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None and feather is not None
+
+    def _path(self, key: str, version: str) -> str:
+        name = re.sub(r"\W+", "_", key)
+        return os.path.join(self.directory, f"{name}-{version}")
+
+    def load(
+        self, key: str, loader: Callable[[], tuple], mtime: float | None = None
+    ) -> tuple[pd.DataFrame, list]:
+        """
+        Attach a published dataset, publishing it first if needed.
+
+        Only one process loads and publishes a dataset at a time, the others
+        wait for it and attach the published file.
+
+        Parameters:
+        key (str): The normalized dataset name.
+        loader (Callable): Function building the dataset when not published.
+        mtime (float | None): The modification time of the dataset source.
+
+        Returns:
+        tuple[pd.DataFrame, list]: The prepared DataFrame and its categorical
+                                   columns. The DataFrame is read-only when
+                                   attached from the store.
+        """
+        if not self.enabled:
+            return loader()
+        version = "static" if mtime is None else f"{mtime:.6f}"
+        path = self._path(key, version) + SHARED_SUFFIX
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key, "lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(path):
+                value = loader()
+                if not self._publish(key, value[0], path):
+                    return value
+        try:
+            return read_frame(path, zero_copy=True)
+        except Exception as e:
+            logger.warning(f"Could not attach dataset '{key}' from {path}: {e}")
+            return loader()
+
+    def _publish(self, key: str, df: pd.DataFrame, path: str) -> bool:
+        try:
+            write_frame(df, path)
+        except Exception as e:
+            logger.warning(f"Could not publish dataset '{key}' to {path}: {e}")
+            return False
+        logger.info(f"Published dataset '{key}' to {path}")
+        # Processes attached to previous versions keep their mapping alive
+        for stale_path in glob.glob(f"{self._path(key, '*')}{SHARED_SUFFIX}"):
+            if stale_path != path:
+                os.remove(stale_path)
+        return True
+
+    def invalidate(self, key: str | None = None) -> None:
+        """
+        Remove published datasets, so they are loaded again on next access.
+
+        Lock files are kept: a process may hold or be waiting on one, and a
+        new file would not exclude it.
+
+        Parameters:
+        key (str | None): The normalized dataset name to remove. If None,
+                          every published dataset is removed, e.g. when the
+                          server shuts down.
+        """
+        if self.directory is None:
+            return
+        if key is None:
+            pattern = os.path.join(self.directory, "*" + SHARED_SUFFIX)
+        else:
+            pattern = self._path(key, "*") + SHARED_SUFFIX
+        for path in glob.glob(pattern):
+            os.remove(path)
+
+
+shared_dataset_store = SharedDatasetStore(SHARED_DATASETS_DIR)